@@ -0,0 +1,208 @@
+"""
+Benchmark the dissolve processes against the per-pg_id loop implementations they replaced.
+
+Builds a synthetic intersected frame (PG cells split into several FEWS NET fragments), checks that
+the current implementation reproduces the legacy output and times both.
+
+Usage (from the repository root):
+    python -m Benchmarks.benchmark_dissolve --cells 20000 --fragments 4
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from Utils.process_area_combined_threshold import assign_combined_threshold
+from Utils.process_area_majority_overlap import assign_majority_overlap
+from Utils.process_area_threshold import assign_max_above_threshold_with_fallback
+from Utils.process_greatest_pop import aggregate_by_greatest_population
+from Utils.process_pop_area_weights import aggregate_with_weighted_proportions, calculate_population_percentiles
+
+
+# ----------------------------------------------------------------------------------------------------
+# Legacy loop implementations, kept for comparison only
+# ----------------------------------------------------------------------------------------------------
+
+def legacy_max_above_threshold_with_fallback(df, threshold=0.2, pg_id_column='pg_id'):
+    results = []
+    for pg_id, group in df.groupby(pg_id_column):
+        valid_values = group[group['Proportional_area'] >= threshold]
+        if not valid_values.empty:
+            dissolved_value = valid_values['value'].max()
+        else:
+            dissolved_value = (group['value'] * group['Proportional_area']).sum()
+        results.append({'pg_id': pg_id, 'dissolved_value': dissolved_value})
+    return pd.DataFrame(results)
+
+
+def legacy_combined_threshold(df, proportional_threshold=0.3, critical_value=3, pg_id_column='pg_id'):
+    results = []
+    for pg_id, group in df.groupby(pg_id_column):
+        filtered = group[(group['Proportional_area'] >= proportional_threshold) & (group['value'] > critical_value)]
+        if not filtered.empty:
+            dissolved_value = filtered['value'].max()
+        else:
+            dissolved_value = (group['value'] * group['Proportional_area']).sum()
+        results.append({'pg_id': pg_id, 'dissolved_value': dissolved_value})
+    return pd.DataFrame(results)
+
+
+def legacy_majority_overlap(df, pg_id_column='pg_id'):
+    results = []
+    for pg_id, group in df.groupby(pg_id_column):
+        dominant_row = group.loc[group['Proportional_area'].idxmax()]
+        results.append({'pg_id': pg_id, 'dissolved_value': dominant_row['value']})
+    return pd.DataFrame(results)
+
+
+def legacy_greatest_population(df):
+    df.fillna({'Proportion_population': 0, 'Proportional_area': 0, 'feature_population': 0, 'Cell_population': 0}, inplace=True)
+    pg_decision = {}
+    for pg_id, group in df.groupby('pg_id'):
+        if group['Proportion_population'].max() > 0 or group['Cell_population'].max() > 0:
+            pg_decision[pg_id] = 'population'
+        else:
+            pg_decision[pg_id] = 'area'
+
+    def calculate_weighted_value(row):
+        if pg_decision[row['pg_id']] == 'population':
+            return row['Proportion_population'] * row['value']
+        else:
+            return row['Proportional_area'] * row['value']
+
+    df['weighted_value'] = df.apply(calculate_weighted_value, axis=1)
+    aggregated_df = df.groupby('pg_id').agg({'weighted_value': 'sum', 'value': 'sum'}).reset_index()
+    aggregated_df.rename(columns={'weighted_value': 'final_weighted_value', 'value': 'original_sum_value'}, inplace=True)
+    return aggregated_df
+
+
+def legacy_weighted_proportions(df, population_percentiles, user_defined_weights):
+    def calculate_weighted_value(row):
+        upper_key, lower_key = sorted(population_percentiles.keys(), key=lambda x: int(x.rstrip('th')), reverse=True)
+        if row['Cell_population'] >= population_percentiles[upper_key]:
+            weight_population, weight_area = user_defined_weights[upper_key]
+        elif row['Cell_population'] >= population_percentiles[lower_key]:
+            weight_population, weight_area = user_defined_weights[lower_key]
+        else:
+            weight_population, weight_area = (0.0, 1.0)
+        return (
+            weight_population * row['Proportion_population'] * row['value'] +
+            weight_area * row['Proportional_area'] * row['value']
+        )
+
+    df['weighted_value'] = df.apply(calculate_weighted_value, axis=1)
+    aggregated_df = df.groupby('pg_id').agg({'weighted_value': 'sum', 'value': 'sum'}).reset_index()
+    aggregated_df.rename(columns={'weighted_value': 'final_weighted_value', 'value': 'original_sum_value'}, inplace=True)
+    return aggregated_df
+
+
+# ----------------------------------------------------------------------------------------------------
+
+def make_intersected_frame(cells, fragments, seed=0):
+    """
+    Build a synthetic intersected frame with a random number (1..fragments) of fragments per cell.
+
+    Args:
+        cells (int): Number of PG cells.
+        fragments (int): Maximum number of fragments per cell.
+        seed (int): Random seed.
+
+    Returns:
+        DataFrame: 'pg_id', 'value' (IPC phase 1-5, a few missing), 'Proportional_area',
+                   'Proportion_population', 'feature_population' and 'Cell_population' (a few
+                   missing) per fragment.
+    """
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(1, fragments + 1, size=cells)
+    pg_id = np.repeat(rng.permutation(259200)[:cells] + 1, counts)
+
+    # Split every cell's area into random proportions; some cells only partially covered
+    raw = rng.random(len(pg_id))
+    totals = np.repeat(np.bincount(np.repeat(np.arange(cells), counts), weights=raw), counts)
+    coverage = np.repeat(rng.choice([1.0, 0.6], size=cells, p=[0.9, 0.1]), counts)
+    proportional_area = raw / totals * coverage
+
+    # Equal proportions to exercise the tie rule of the majority overlap
+    proportional_area[rng.random(len(pg_id)) < 0.01] = 0.5
+
+    value = rng.integers(1, 6, size=len(pg_id)).astype(float)
+    value[rng.random(len(pg_id)) < 0.02] = np.nan
+
+    # Population shares follow the area shares loosely; a few cells have no population data
+    population_share = raw * rng.random(len(pg_id))
+    population_share /= np.repeat(np.bincount(np.repeat(np.arange(cells), counts), weights=population_share), counts)
+    cell_population = np.repeat(rng.lognormal(8, 2, size=cells), counts)
+    cell_population[np.repeat(rng.random(cells) < 0.02, counts)] = np.nan
+
+    df = pd.DataFrame({
+        'pg_id': pg_id,
+        'value': value,
+        'Proportional_area': proportional_area,
+        'Proportion_population': population_share,
+        'feature_population': population_share * cell_population,
+        'Cell_population': cell_population,
+    })
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def _time(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run_benchmark(cells=20000, fragments=4, seed=0):
+    """
+    Time every process against its legacy implementation and check the outputs agree.
+
+    Args:
+        cells (int): Number of PG cells in the synthetic frame.
+        fragments (int): Maximum number of fragments per cell.
+        seed (int): Random seed.
+
+    Returns:
+        DataFrame: One row per process with the legacy and current run times and the speedup.
+    """
+    df = make_intersected_frame(cells, fragments, seed)
+    print(f"Synthetic intersected frame: {len(df)} fragments over {df['pg_id'].nunique()} PG cells")
+
+    percentiles = calculate_population_percentiles(df, column='Cell_population', percentiles=[50, 85])
+    weights = {'85th': (1.0, 0.0), '50th': (0.75, 0.25)}
+
+    cases = [
+        ('2: max above threshold', legacy_max_above_threshold_with_fallback, assign_max_above_threshold_with_fallback, {'threshold': 0.2}),
+        ('3: combined threshold', legacy_combined_threshold, assign_combined_threshold, {'proportional_threshold': 0.3, 'critical_value': 3}),
+        ('4: majority overlap', legacy_majority_overlap, assign_majority_overlap, {}),
+        ('5: greatest population', legacy_greatest_population, aggregate_by_greatest_population, {}),
+        ('6: population/area weights', legacy_weighted_proportions, aggregate_with_weighted_proportions,
+         {'population_percentiles': percentiles, 'user_defined_weights': weights}),
+    ]
+
+    rows = []
+    for name, legacy, current, kwargs in cases:
+        # Some processes add columns to their input; give each run its own copy
+        expected, legacy_seconds = _time(legacy, df.copy(), **kwargs)
+        result, current_seconds = _time(current, df.copy(), **kwargs)
+
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+        rows.append({
+            'process': name,
+            'legacy_s': round(legacy_seconds, 3),
+            'current_s': round(current_seconds, 3),
+            'speedup': round(legacy_seconds / current_seconds, 1),
+        })
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dissolve processes against the legacy loops.")
+    parser.add_argument('--cells', type=int, default=20000, help="Number of PG cells (default: 20000).")
+    parser.add_argument('--fragments', type=int, default=4, help="Maximum fragments per cell (default: 4).")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default: 0).")
+    args = parser.parse_args()
+
+    run_benchmark(args.cells, args.fragments, args.seed)
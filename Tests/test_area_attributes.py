@@ -0,0 +1,45 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import box
+
+from Utils import area_attributes
+from Utils.pg_cell_area import load_cell_area_lookup, prepare_cell_area_table
+
+
+@pytest.fixture
+def cell_areas(tmp_path, monkeypatch):
+    # Cell 1: half land; cell 2: land area unknown; cell 3: less land than the fragments cover
+    path = tmp_path / 'pg_cell_area.parquet'
+    pd.DataFrame({
+        'pg_id': [1, 2, 3],
+        'cell_area_sq_km': [100.0, 100.0, 100.0],
+        'land_area_sq_km': [50.0, np.nan, 10.0],
+    }).to_parquet(path, index=False)
+    monkeypatch.setattr(area_attributes, 'load_cell_area_lookup', lambda: load_cell_area_lookup(path))
+    return path
+
+
+def test_proportional_area_uses_land_area(cell_areas):
+    fragments = gpd.GeoDataFrame(
+        {'pg_id': [1, 1, 2, 3, 3], 'Feature_area_sq_km': [10.0, 15.0, 20.0, 12.0, 4.0]},
+        geometry=[box(0, 0, 1, 1)] * 5, crs=4326,
+    )
+
+    result = area_attributes.define_area_attributes(fragments)
+
+    assert result['Cell_Area'].tolist() == [100.0] * 5
+    np.testing.assert_allclose(result['Proportional_area'], [0.2, 0.3, 0.2, 0.75, 0.25])
+
+
+def test_missing_table_is_not_built(tmp_path):
+    path = tmp_path / 'pg_cell_area.parquet'
+
+    with pytest.raises(FileNotFoundError):
+        load_cell_area_lookup(path)
+    assert not path.exists()
+
+    prepare_cell_area_table(path)
+    cell_area, _ = load_cell_area_lookup(path)
+    assert len(cell_area) == 360 * 720 + 1
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from Utils.access_population_resource import download_worldpop_data
+
+
+PAYLOAD = os.urandom(200_000)
+PAYLOAD_SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the WorldPop server. Behaviour is set on the server object:
+    accept_ranges (advertise and honour Range requests), payload (bytes served),
+    truncate_first (number of range responses cut off halfway before the connection is closed) and
+    short_ranges (None, 'header': answer with a shorter range than requested, or 'body': claim the
+    requested range but send fewer bytes).
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def _headers(self, status, length, content_range=None):
+        self.send_response(status)
+        self.send_header('Content-Length', str(length))
+        if self.server.accept_ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        if content_range is not None:
+            self.send_header('Content-Range', content_range)
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._headers(200, len(self.server.payload))
+
+    def do_GET(self):
+        payload = self.server.payload
+        match = re.fullmatch(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        self.server.requests.append(self.headers.get('Range'))
+
+        if not (self.server.accept_ranges and match):
+            self._headers(200, len(payload))
+            self.wfile.write(payload)
+            return
+
+        start, end = int(match.group(1)), int(match.group(2))
+        body = payload[start:end + 1]
+        if self.server.short_ranges == 'header':
+            body = body[:-10]
+            self._headers(206, len(body), f"bytes {start}-{end - 10}/{len(payload)}")
+            self.wfile.write(body)
+            return
+        if self.server.short_ranges == 'body':
+            self._headers(206, len(body) - 10, f"bytes {start}-{end}/{len(payload)}")
+            self.wfile.write(body[:-10])
+            return
+        self._headers(206, len(body), f"bytes {start}-{end}/{len(payload)}")
+
+        with self.server.lock:
+            truncate = self.server.truncate_first > 0
+            self.server.truncate_first -= 1
+        if truncate:
+            # Send half of the range, then drop the connection
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    httpd.accept_ranges = True
+    httpd.payload = PAYLOAD
+    httpd.truncate_first = 0
+    httpd.short_ranges = None
+    httpd.requests = []
+    httpd.lock = threading.Lock()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url_of(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/payload.bin"
+
+
+def test_interrupted_download_resumes(server, tmp_path):
+    download = partial(download_worldpop_data, url_of(server), save_folder=tmp_path, segments=4, chunk_size=4096)
+
+    # Every segment is cut off halfway: the download fails and keeps its progress
+    server.truncate_first = 4
+    assert download(expected_sha256=PAYLOAD_SHA256) is None
+    assert (tmp_path / 'payload.bin.part').exists()
+    with open(tmp_path / 'payload.bin.part.json') as file:
+        state = json.load(file)
+    assert 0 < sum(segment['done'] for segment in state['segments']) < len(PAYLOAD)
+
+    # The second call only requests the missing bytes of each segment
+    server.requests.clear()
+    path = download(expected_sha256=PAYLOAD_SHA256)
+    assert path == os.path.join(tmp_path, 'payload.bin')
+    with open(path, 'rb') as file:
+        assert file.read() == PAYLOAD
+
+    starts = sorted(int(re.match(r'bytes=(\d+)-', header).group(1)) for header in server.requests)
+    segment_starts = sorted(segment['start'] for segment in state['segments'])
+    assert all(start > segment_start for start, segment_start in zip(starts, segment_starts))
+    assert not (tmp_path / 'payload.bin.part').exists()
+    assert not (tmp_path / 'payload.bin.part.json').exists()
+
+
+def test_server_without_range_support(server, tmp_path):
+    server.accept_ranges = False
+
+    path = download_worldpop_data(url_of(server), save_folder=tmp_path, segments=4, expected_sha256=PAYLOAD_SHA256)
+
+    assert path is not None
+    with open(path, 'rb') as file:
+        assert file.read() == PAYLOAD
+    assert server.requests == [None]
+
+
+def test_corrupted_payload_is_rejected(server, tmp_path):
+    server.payload = PAYLOAD[:-1] + bytes([PAYLOAD[-1] ^ 0xFF])
+
+    path = download_worldpop_data(url_of(server), save_folder=tmp_path, segments=4, expected_sha256=PAYLOAD_SHA256)
+
+    assert path is None
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize('short_ranges', ['header', 'body'])
+def test_short_ranges_are_not_saved(server, tmp_path, short_ranges):
+    server.short_ranges = short_ranges
+
+    path = download_worldpop_data(url_of(server), save_folder=tmp_path, segments=4)
+
+    assert path is None
+    assert not (tmp_path / 'payload.bin').exists()
+
+    # The recorded progress only counts bytes that were received; a good server completes the file
+    server.short_ranges = None
+    path = download_worldpop_data(url_of(server), save_folder=tmp_path, segments=4, expected_sha256=PAYLOAD_SHA256)
+    with open(path, 'rb') as file:
+        assert file.read() == PAYLOAD
+
+
+def test_unexpected_size_is_not_downloaded(server, tmp_path):
+    path = download_worldpop_data(url_of(server), save_folder=tmp_path, expected_size=len(PAYLOAD) + 1)
+
+    assert path is None
+    assert server.requests == []
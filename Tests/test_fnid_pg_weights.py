@@ -0,0 +1,65 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+
+from Utils.fnid_pg_weights import build_weight_matrix, dissolve_boundary_set, sparse_product
+
+
+def dense_product(fragments, fnids, weights, values):
+    # Reference: one pg_id x fnid matrix, filled fragment by fragment
+    pg_ids = np.unique(fragments['pg_id'])
+    dense = np.zeros((len(pg_ids), len(fnids)))
+    for pg_id, fnid, weight in zip(fragments['pg_id'], fragments['fnid'], weights):
+        dense[np.searchsorted(pg_ids, pg_id), fnids.get_loc(fnid)] += weight
+    return dense @ values
+
+
+def test_weight_matrix_sums_duplicate_pairs():
+    fragments = pd.DataFrame({'pg_id': [7, 3, 7, 3, 9], 'fnid': ['b', 'a', 'b', 'b', 'c']})
+    fnids = pd.Index(['a', 'b', 'c'])
+
+    matrix = build_weight_matrix(fragments, fnids, np.array([0.25, 0.5, 0.25, 0.5, 1.0]))
+
+    assert matrix['pg_ids'].tolist() == [3, 7, 9]
+    assert list(zip(matrix['row'].tolist(), matrix['col'].tolist())) == [(0, 0), (0, 1), (1, 1), (2, 2)]
+    assert matrix['weight'].tolist() == [0.5, 0.5, 0.5, 1.0]
+
+
+def test_sparse_product_matches_dense_product():
+    rng = np.random.default_rng(0)
+    fnids = pd.Index([f'F{i}' for i in range(6)])
+    fragments = pd.DataFrame({'pg_id': rng.integers(1, 10, 40), 'fnid': rng.choice(fnids, 40)})
+    weights = rng.random(40)
+    values = rng.random((len(fnids), 3))
+
+    result = sparse_product(build_weight_matrix(fragments, fnids, weights), values)
+
+    np.testing.assert_allclose(result, dense_product(fragments, fnids, weights, values))
+
+
+def test_sparse_product_of_empty_matrix():
+    fragments = pd.DataFrame({'pg_id': np.array([], dtype=np.int64), 'fnid': np.array([], dtype=object)})
+    fnids = pd.Index(['a', 'b'])
+
+    result = sparse_product(build_weight_matrix(fragments, fnids, np.array([])), np.ones((2, 3)))
+
+    assert result.shape == (0, 3)
+
+
+@pytest.mark.parametrize('process', [1, 'all'])
+def test_dissolve_boundary_set_without_fragments(process):
+    # A boundary set whose units have no usable polygon: nothing to dissolve on any date
+    fragments = gpd.GeoDataFrame(
+        {'fnid': [], 'pg_id': [], 'Proportional_area': [], 'Proportion_population': [], 'Cell_population': []},
+        geometry=[], crs=4326,
+    )
+    units = gpd.GeoDataFrame({'fnid': ['a'], 'value': [3.0]}, geometry=[None], crs=4326)
+    params = {
+        1: {}, 2: {'threshold': 0.2}, 3: {'proportional_threshold': 0.3, 'critical_value': 3}, 4: {}, 5: {},
+        6: {'thresholds': [50, 85], 'weights': {'85th': (1, 0), '50th': (0.5, 0.5)}},
+    }
+
+    results = dissolve_boundary_set(fragments, [units, units], ['2020-01-01', '2020-02-01'], process, params if process == 'all' else {})
+
+    assert [len(result) for result in results] == [0, 0]
@@ -1,13 +1,25 @@
 
+import hashlib
+import json
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import requests
 from pathlib import Path
 
+from Utils.population_manifest import default_population_folder, load_population_manifest, parse_reference_urls, update_population_manifest
+from Utils.process_geotiff import ingest_population_raster, tiled_population_path
+
 
 def check_if_population_local(year, save_folder=None):
     """
     Check if population data for a specific year has been downloaded to a folder.
 
+    The year is looked up in the population manifest (see Utils/population_manifest.py).
+
     Args:
         year (int or str): The year to check for (e.g., 2020).
         save_folder (str or None): The folder path where files are stored. If None, defaults to 
@@ -17,85 +29,73 @@ def check_if_population_local(year, save_folder=None):
         bool: True if the file for the specified year exists, False if not.
     """
     try:
-        # Determine the save folder
-        if save_folder is None:
-            # Map the default location programmatically
-            project_root = Path(__file__).resolve().parent.parent
-            save_folder = project_root / 'Data' / 'External' / 'Population'
-
-        # Check if the folder exists
-        if not os.path.exists(save_folder):
-            print(f"Folder does not exist: {save_folder}")
+        entry = load_population_manifest(save_folder).get(int(year), {})
+        if 'file' not in entry:
             return False
 
-        # List all files in the folder
-        files = os.listdir(save_folder)
-
-        # Check if any file contains the year as part of its name
-        for file in files:
-            if f"ppp_{year}_1km" in file and file.endswith(".tif"):
-                return True
-
-        # No matching file found
-        return False
+        # Guard against files removed by hand since they were registered
+        folder = default_population_folder() if save_folder is None else Path(save_folder)
+        return os.path.exists(folder / entry['file'])
 
     except Exception as e:
         print(f"An error occurred: {e}")
         return False
 
 
-
-
-def get_population_data(year, save_folder=None):
+def get_population_data(year, save_folder=None, ingest=True):
     """
-    Get the full path to a population data file with the specified year in its name.
+    Get the full path to the population raster of a year from the population manifest.
+
+    All population reads go through the tiled, compressed copy of the downloaded raster
+    (<name>_tiled.tif, see process_geotiff.ingest_population_raster). It is created here on the
+    first request for the year and recorded in the manifest; if the conversion fails (or ingest is
+    False and there is no tiled copy yet) the downloaded raster is returned.
 
     Args:
         year (int or str): The year to check for in the filename (e.g., 2020).
         save_folder (str or None): The folder path where files are stored. If None, defaults to 
                                    "Data/External/Population" relative to the project root.
+        ingest (bool): Create the tiled copy (and update the manifest) if it does not exist. Worker
+                       processes of a parallel run only read.
 
     Returns:
         str or None: The full path to the file if it exists, or None if not found.
     """
     try:
-        # Determine the save folder
-        if save_folder is None:
-            # Map the default location programmatically
-            project_root = Path(__file__).resolve().parent.parent
-            save_folder = project_root / 'Data' / 'External' / 'Population'
-
-        # Check if the folder exists
-        if not os.path.exists(save_folder):
-            print(f"Folder does not exist: {save_folder}")
+        folder = default_population_folder() if save_folder is None else Path(save_folder)
+        entry = load_population_manifest(save_folder).get(int(year), {})
+        if 'file' not in entry:
+            print(f"No population raster is registered for {year}.")
             return None
 
-        # List all files in the folder
-        files = os.listdir(save_folder)
+        source_path = str(folder / entry['file'])
+        tiled_path = tiled_population_path(source_path)
 
-        # Look for the file with the specified year
-        for file in files:
-            if f"ppp_{year}_1km" in file and file.endswith(".tif"):
-                return os.path.join(save_folder, file)
+        # The tiled copy may have been made by another process since the manifest was loaded
+        if 'tiled_file' in entry or os.path.exists(tiled_path):
+            if 'tiled_file' not in entry and ingest:
+                update_population_manifest(year, save_folder, tiled_file=os.path.basename(tiled_path))
+            return tiled_path
 
-        # No matching file found
-        return None
+        if not ingest or ingest_population_raster(source_path) is None:
+            return source_path
+        update_population_manifest(year, save_folder, tiled_file=os.path.basename(tiled_path))
+        return tiled_path
 
     except Exception as e:
         print(f"An error occurred: {e}")
         return None
 
 
-
 def get_url_for_year(year, dict_path=None):
     """
-    Retrieve the URL associated with a specific year from a text file.
+    Retrieve the URL associated with a specific year.
     If the year is greater than 2020, return the URL for 2020.
 
     Args:
         year (int): The year to search for.
-        dict_path (str, optional): Path to the text file containing year-to-URL associations.
-                                   Defaults to a pre-mapped location.
+        dict_path (str, optional): Path to a text file containing year-to-URL associations. Defaults
+                                   to the URLs of the population manifest (from Population_Reference.txt).
 
     Returns:
         str: The URL associated with the specified year, or the 2020 URL if the year > 2020.
@@ -103,78 +103,126 @@ def get_url_for_year(year, dict_path=None):
     try:
         # Ensure year is an integer
         year = int(year)
-        print(f"Starting function for year {year}")
 
-        # Determine the dictionary file path
         if dict_path is None:
-            project_root = Path(__file__).resolve().parent.parent
-            dict_path_file = project_root / 'Data' / 'External' / 'Population_Reference.txt'
+            urls = {entry_year: entry['url'] for entry_year, entry in load_population_manifest().items() if 'url' in entry}
         else:
-            dict_path_file = Path(dict_path)
-
-        url_2020 = None  # Store the 2020 URL for fallback
-        with open(dict_path_file, 'r') as file:
-            print("Opened file successfully.")
-            for line in file:
-                parts = line.split(':', 1)
-                if len(parts) == 2:
-                    try:
-                        file_year = int(parts[0].strip())  # Convert year to int
-                        url = parts[1].strip()            # Extract URL
-
-                        # Debug: Show the mapping
-                        print(f"DEBUG: Found mapping: {file_year} -> {url}")
-
-                        # Save the 2020 URL for fallback
-                        if file_year == 2020:
-                            url_2020 = url
-                            print("DEBUG: Saved 2020 URL for fallback.")
-
-                        # Return URL if it matches the exact year
-                        if file_year == year:
-                            print(f"DEBUG: Found URL for year {year}: {url}")
-                            return url
-
-                    except ValueError:
-                        print(f"DEBUG: Skipping invalid entry in file: {line.strip()}")
-                        continue
-        
+            urls = parse_reference_urls(dict_path)
+
+        if year in urls:
+            return urls[year]
+
         # If year > 2020, return the 2020 URL
-        if year > 2020 and url_2020:
-            print(f"DEBUG: Year {year} is greater than 2020. Using 2020 URL as fallback.")
-            return url_2020
+        if year > 2020 and 2020 in urls:
+            print(f"Year {year} is greater than 2020. Using the 2020 URL as fallback.")
+            return urls[2020]
 
-        # Debug: No matching URL found
-        print(f"DEBUG: No URL found for year {year}, and no fallback available.")
+        print(f"No URL found for year {year}, and no fallback available.")
         return None
 
     except FileNotFoundError:
-        print(f"Error: File not found at {dict_path_file}")
+        print(f"Error: File not found at {dict_path}")
         return None
-    except ValueError as ve:
+    except ValueError:
         print("Error: Invalid year format. Ensure the input year is a valid integer.")
-        print(f"DEBUG: ValueError - {ve}")
         return None
     except Exception as e:
         print(f"An error occurred: {e}")
-        print(f"DEBUG: Exception - {e}")
         return None
 
 
+def _download_segment(session, url, part_path, segment, chunk_size, on_progress):
+    """
+    Download the remaining bytes of one segment with an HTTP Range request and write them in place.
 
+    The response must cover exactly the requested range (Content-Range). Data is flushed to disk
+    before progress is reported, so recorded progress never counts bytes that were not written.
 
-def download_worldpop_data(url, save_folder=None):
+    Args:
+        session (requests.Session): The session used for the request.
+        url (str): The URL of the file.
+        part_path (str): The partial file, already allocated to the full size.
+        segment (dict): {'start', 'end', 'done'}: inclusive byte range and bytes already written.
+        chunk_size (int): Bytes per read.
+        on_progress (callable): Called with (segment, bytes_written) after every chunk.
+
+    Raises:
+        requests.exceptions.RequestException: If the server answers with another range or sends too few bytes.
+    """
+    position = segment['start'] + segment['done']
+    if position > segment['end']:
+        return
+
+    headers = {'Range': f"bytes={position}-{segment['end']}"}
+    with session.get(url, headers=headers, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise requests.exceptions.RequestException(f"Server ignored the range request (status {response.status_code}).")
+
+        content_range = re.fullmatch(r'bytes (\d+)-(\d+)/(\d+|\*)', response.headers.get('Content-Range', '').strip())
+        if content_range is None or (int(content_range.group(1)), int(content_range.group(2))) != (position, segment['end']):
+            raise requests.exceptions.RequestException(
+                f"Server answered bytes {position}-{segment['end']} with Content-Range "
+                f"'{response.headers.get('Content-Range')}'."
+            )
+
+        remaining = segment['end'] - position + 1
+        with open(part_path, 'r+b') as file:
+            file.seek(position)
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if not chunk:
+                    continue
+                chunk = chunk[:remaining]
+                file.write(chunk)
+                file.flush()
+                os.fsync(file.fileno())
+                remaining -= len(chunk)
+                on_progress(segment, len(chunk))
+                if remaining == 0:
+                    break
+
+    if remaining > 0:
+        raise requests.exceptions.RequestException(
+            f"Range {segment['start']}-{segment['end']} ended {remaining} bytes short."
+        )
+
+
+def _sha256(path, chunk_size):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def download_worldpop_data(url, save_folder=None, segments=8, chunk_size=8 << 20, expected_sha256=None, expected_size=None,
+                          session=None):
     """
     Download a file from a given URL and save it to a specified or default folder.
 
+    The file is fetched in parallel HTTP Range segments into '<filename>.part', with progress recorded
+    in '<filename>.part.json' so an interrupted download resumes where it stopped. Every segment
+    must be complete and the size (and the SHA-256 checksum, when given) must match before the
+    partial file is atomically renamed to its final name, so a truncated download is never mistaken
+    for a complete one. Servers that do not
+    support ranges are downloaded in a single stream. The raster is then recorded in the
+    population manifest with its URL, size and SHA-256 checksum.
+
     Args:
         url (str): The URL of the file to be downloaded.
-        save_folder (str or None): The folder path where the file should be saved. 
+        save_folder (str or None): The folder path where the file should be saved.
                                    Defaults to "Data/External/Population/<filename.tif>" relative to the project root.
+        segments (int): Number of parallel range requests.
+        chunk_size (int): Bytes read per chunk.
+        expected_sha256 (str or None): Expected SHA-256 hex digest of the complete file.
+        expected_size (int or None): Expected size of the complete file in bytes.
+        session (requests.Session or None): Session used for the requests. A new one is created if None.
 
     Returns:
-        str: The full path to the downloaded file.
+        str: The full path to the downloaded file, or None if the download failed.
     """
+    session = requests.Session() if session is None else session
+
     try:
         # Extract the filename from the URL
         filename = url.split('/')[-1]
@@ -190,21 +238,111 @@ def download_worldpop_data(url, save_folder=None):
 
         # Construct the full save path
         save_path = os.path.join(save_folder, filename)
+        part_path = save_path + '.part'
+        state_path = save_path + '.part.json'
+
+        # Find the size of the file and whether the server accepts range requests
+        head = session.head(url, allow_redirects=True, timeout=60)
+        head.raise_for_status()
+        size = int(head.headers.get('Content-Length', 0))
+        accepts_ranges = head.headers.get('Accept-Ranges', '').lower() == 'bytes'
+        if expected_size is not None and size > 0 and size != expected_size:
+            print(f"The server reports {size} bytes for {filename}, expected {expected_size}; the download was not started.")
+            return None
+        size = size or (expected_size or 0)
 
-        # Download the file
         print("Downloading WorldPop population data...")
-        response = requests.get(url, stream=True)
-        response.raise_for_status()  # Raise an error for bad responses
 
-        # Save the file in chunks
-        with open(save_path, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=1024):
-                if chunk:
-                    file.write(chunk)
+        if size > 0 and accepts_ranges:
+            # Resume from the recorded progress if it belongs to the same file
+            state = None
+            if os.path.exists(state_path) and os.path.exists(part_path):
+                with open(state_path, 'r') as file:
+                    state = json.load(file)
+                if state.get('url') != url or state.get('size') != size:
+                    state = None
+
+            if state is None:
+                bounds = np.linspace(0, size, max(1, min(segments, size)) + 1).astype(np.int64)
+                state = {
+                    'url': url,
+                    'size': size,
+                    'segments': [
+                        {'start': int(start), 'end': int(end) - 1, 'done': 0}
+                        for start, end in zip(bounds[:-1], bounds[1:])
+                    ],
+                }
+                with open(part_path, 'wb') as file:
+                    file.truncate(size)
+            else:
+                done = sum(segment['done'] for segment in state['segments'])
+                print(f"Resuming download: {done / size:.0%} already downloaded.")
+
+            lock = threading.Lock()
+
+            def save_state():
+                with open(state_path, 'w') as file:
+                    json.dump(state, file)
+
+            def on_progress(segment, written):
+                with lock:
+                    segment['done'] += written
+                    save_state()
+
+            save_state()
+            with ThreadPoolExecutor(max_workers=len(state['segments'])) as executor:
+                futures = [
+                    executor.submit(_download_segment, session, url, part_path, segment, chunk_size, on_progress)
+                    for segment in state['segments']
+                ]
+                for future in futures:
+                    future.result()
+
+            # Only a file whose every segment arrived in full may be renamed
+            incomplete = [segment for segment in state['segments'] if segment['done'] != segment['end'] - segment['start'] + 1]
+            if incomplete:
+                print(f"Download incomplete: {len(incomplete)} segment(s) did not receive all their bytes.")
+                return None
+        else:
+            # No range support: stream the whole file in one request
+            with session.get(url, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                with open(part_path, 'wb') as file:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if chunk:
+                            file.write(chunk)
+
+        # Verify the partial file before giving it its final name
+        if size > 0 and os.path.getsize(part_path) != size:
+            print(f"Download incomplete: expected {size} bytes, found {os.path.getsize(part_path)}.")
+            return None
+        digest = _sha256(part_path, chunk_size)
+        if expected_sha256 is not None and digest != expected_sha256.lower():
+            print("Checksum mismatch: the downloaded file is corrupt and has been removed.")
+            os.remove(part_path)
+            if os.path.exists(state_path):
+                os.remove(state_path)
+            return None
+
+        os.replace(part_path, save_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+
+        # Record the raster and its integrity in the population manifest (any earlier tiled copy is stale)
+        match = re.match(r'ppp_(\d{4})_', filename)
+        if match:
+            stale_tiled = tiled_population_path(save_path)
+            if os.path.exists(stale_tiled):
+                os.remove(stale_tiled)
+            update_population_manifest(
+                match.group(1), save_folder,
+                url=url, file=filename, size=os.path.getsize(save_path), sha256=digest, tiled_file=None,
+            )
 
         print(f"File downloaded successfully to: {save_path}")
         return save_path
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, OSError) as e:
         print(f"An error occurred during download: {e}")
+        print("Partial progress has been kept; calling the download again will resume it.")
         return None
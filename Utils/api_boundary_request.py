@@ -1,43 +1,122 @@
+import hashlib
+import json
+import os
+from io import BytesIO
+from pathlib import Path
+
 import requests
 import geopandas as gpd
-from io import BytesIO
 
 
+# Unit types requested for every country. The cache key is derived from this set,
+# so changing it invalidates previously cached boundaries automatically.
+BOUNDARY_UNIT_TYPES = (
+    "idp_camp",
+    "livelihood_zone",
+    "national_park",
+    "fsc_admin",
+    "fsc_admin_lhz",
+    "fsc_lhz",
+    "fsc_rm_admin",
+)
+
+
+def boundary_cache_paths(country_code, unit_types=BOUNDARY_UNIT_TYPES, cache_folder=None):
+    """
+    Build the GeoParquet and metadata paths used to cache the boundaries of a country.
+
+    Args:
+        country_code (str): The FEWS NET country code.
+        unit_types (iterable): The unit types included in the request.
+        cache_folder (str or None): The folder holding cached boundaries. If None, defaults to
+                                    "Data/External/Boundaries" relative to the project root.
+
+    Returns:
+        tuple: (parquet_path, metadata_path) as Path objects.
+    """
+    if cache_folder is None:
+        project_root = Path(__file__).resolve().parent.parent
+        cache_folder = project_root / 'Data' / 'External' / 'Boundaries'
+
+    # Short, order-independent digest of the unit-type set
+    unit_key = hashlib.sha1(",".join(sorted(unit_types)).encode("utf-8")).hexdigest()[:10]
+    stem = f"{country_code}_{unit_key}"
+
+    cache_folder = Path(cache_folder)
+    return cache_folder / f"{stem}.parquet", cache_folder / f"{stem}.json"
 
 
-def construct_boundary_api_url(country_code):
+def construct_boundary_api_url(country_code, unit_types=BOUNDARY_UNIT_TYPES, cache_folder=None, use_cache=True):
     """
-    Constructs the FEWS NET API URL for features with the given country code.
+    Retrieve the FEWS NET boundaries for the given country code.
+
+    Boundaries are cached as GeoParquet keyed by country code and unit-type set. When a cached
+    copy exists the request is made conditional (ETag / Last-Modified), so an unchanged resource
+    is answered with 304 and loaded from the cache without downloading or parsing the GeoJSON.
+    If the API cannot be reached the cached copy is used as-is.
 
     Args:
         country_code (str): The country code to include in the API request.
+        unit_types (iterable): The unit types to request. Defaults to BOUNDARY_UNIT_TYPES.
+        cache_folder (str or None): The folder holding cached boundaries. If None, defaults to
+                                    "Data/External/Boundaries" relative to the project root.
+        use_cache (bool): Set to False to always download and skip reading/writing the cache.
 
     Returns:
-        str: The constructed API URL.
+        GeoDataFrame: The boundaries for the country, or None if they could not be retrieved.
     """
     base_url = "https://fdw.fews.net/api/feature/"
-    url = (
-        f"{base_url}?format=geojson&fields=with_attributes&country_code={country_code}"
-        "&unit_type=idp_camp&unit_type=livelihood_zone&unit_type=national_park"
-        "&unit_type=fsc_admin&unit_type=fsc_admin_lhz&unit_type=fsc_lhz&unit_type=fsc_rm_admin"
-    )
+    unit_type_params = "".join(f"&unit_type={unit_type}" for unit_type in unit_types)
+    url = f"{base_url}?format=geojson&fields=with_attributes&country_code={country_code}{unit_type_params}"
+
+    parquet_path, metadata_path = boundary_cache_paths(country_code, unit_types, cache_folder)
+    cached = use_cache and parquet_path.exists() and metadata_path.exists()
 
-    # URL of the GeoJSON file
-    # Fetch the GeoJSON file
-    response = requests.get(url)
+    # Revalidate the cached copy instead of downloading it again
+    headers = {}
+    metadata = {}
+    if cached:
+        with open(metadata_path, "r") as file:
+            metadata = json.load(file)
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+
+    try:
+        response = requests.get(url, headers=headers, timeout=120)
+    except requests.exceptions.RequestException as e:
+        if cached:
+            print(f"Could not reach the FEWS NET API ({e}). Using cached boundaries: {parquet_path}")
+            return gpd.read_parquet(parquet_path)
+        print(f"Failed to fetch data: {e}")
+        return None
+
+    if response.status_code == 304 and cached:
+        print(f"Boundaries for {country_code} are unchanged. Loaded from cache: {parquet_path}")
+        return gpd.read_parquet(parquet_path)
 
     if response.status_code == 200:
         # Load the GeoJSON into a GeoPandas DataFrame
         gdf__fscunits = gpd.read_file(BytesIO(response.content))
         print(f'The API call constructed: {url}')
         print()
-        print("Data downloaded and saved as ipc_data.csv to folder Data/Generated/ipc_data.csv")
-        print()
-        return(gdf__fscunits)
-    else:
-        print(f"Failed to fetch data: {response.status_code}")
 
+        if use_cache:
+            os.makedirs(parquet_path.parent, exist_ok=True)
+            gdf__fscunits.to_parquet(parquet_path)
+            with open(metadata_path, "w") as file:
+                json.dump({
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }, file, indent=2)
+            print(f"Boundaries cached to {parquet_path}")
+            print()
+        return(gdf__fscunits)
 
+    if cached:
+        print(f"Failed to fetch data: {response.status_code}. Using cached boundaries: {parquet_path}")
+        return gpd.read_parquet(parquet_path)
 
-    #unique_countries = sorted(gdf__fscunits['country_code'].unique().tolist())
-    #unique_countries
\ No newline at end of file
+    print(f"Failed to fetch data: {response.status_code}")
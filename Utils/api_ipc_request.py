@@ -1,39 +1,195 @@
+import json
+import os
 import requests
 import pandas as pd
 from pathlib import Path
 
-def construct_ipc_api_url(start_date, end_date, classification='IPC31'):
+
+# Explicit dtypes for the ipcphase.csv columns used by the workflow. Identifiers that repeat on
+# every row are stored as categoricals and the IPC phase as a small integer.
+IPC_CATEGORICAL_COLUMNS = ['fnid', 'country_code', 'scenario_name']
+IPC_DATE_COLUMNS = ['reporting_date', 'projection_start', 'projection_end']
+IPC_VALUE_DTYPE = 'Int8'
+
+
+def read_ipc_csv(csv_path):
+    """
+    Read an ipcphase.csv download with explicit dtypes.
+
+    Args:
+        csv_path (str or Path): Path to the downloaded CSV.
+
+    Returns:
+        DataFrame: The IPC table with categorical identifiers, parsed dates and an Int8 'value'.
+    """
+    # Only request dtypes for the columns present in this download
+    header = pd.read_csv(csv_path, nrows=0).columns
+    dtypes = {column: 'category' for column in IPC_CATEGORICAL_COLUMNS if column in header}
+    if 'value' in header:
+        dtypes['value'] = IPC_VALUE_DTYPE
+    date_columns = [column for column in IPC_DATE_COLUMNS if column in header]
+
+    return pd.read_csv(csv_path, delimiter=",", dtype=dtypes, parse_dates=date_columns)
+
+
+def download_ipc_window(start_date, end_date, classification, csv_path, chunk_size=1 << 20):
+    """
+    Stream one start_date–end_date window of ipcphase.csv to disk and parse it.
+
+    Args:
+        start_date (str): Start date in YYYY-MM-DD format.
+        end_date (str): End date in YYYY-MM-DD format.
+        classification (str): The IPC classification scale (IPC20, IPC30 or IPC31).
+        csv_path (Path): Where to write the downloaded CSV.
+        chunk_size (int): Number of bytes written per chunk while streaming the response.
+
+    Returns:
+        DataFrame: The typed IPC rows for the window.
+    """
     # Base URL
     base_url = "https://fdw.fews.net/api/ipcphase.csv"
 
+    # Construct the URL manually to maintain the structure
+    url_csv = f"{base_url}?start_date={start_date}&end_date={end_date}&classification_scale={classification}"
+    print(f'The API call constructed: {url_csv}')
+    print()
+
+    partial_path = csv_path.with_name(csv_path.name + '.part')
+
+    # Stream the response to disk so the body is never held (or decoded) in memory
+    with requests.get(url_csv, stream=True) as response:
+        response.raise_for_status()
+        with open(partial_path, "wb") as file:
+            preview_printed = False
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if not preview_printed:
+                    # Print the start of the first chunk to see if it's a valid CSV
+                    print(chunk[:500].decode('utf-8', errors='replace'))
+                    preview_printed = True
+                file.write(chunk)
+    os.replace(partial_path, csv_path)
+
+    return read_ipc_csv(csv_path)
+
+
+def missing_month_windows(start_date, end_date, held_months, today=None):
+    """
+    Find the date ranges of a request that are not yet held by the IPC store.
+
+    Months are the unit of bookkeeping. A month that has not ended yet is never treated as
+    held, so the current month is always refreshed.
+
+    Args:
+        start_date (str): Start date in YYYY-MM-DD format.
+        end_date (str): End date in YYYY-MM-DD format.
+        held_months (set): Months already in the store, as 'YYYY-MM' strings.
+        today (Timestamp or None): Reference date for deciding which months are complete.
+
+    Returns:
+        list: (window_start, window_end, months) tuples covering contiguous runs of missing months.
+    """
+    today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today)
+    months = pd.period_range(pd.Period(start_date, 'M'), pd.Period(end_date, 'M'), freq='M')
+
+    windows = []
+    run = []
+    for month in months:
+        complete = month.end_time.normalize() < today
+        if str(month) in held_months and complete:
+            if run:
+                windows.append(run)
+                run = []
+        else:
+            run.append(month)
+    if run:
+        windows.append(run)
+
+    return [
+        (run[0].start_time.strftime('%Y-%m-%d'), run[-1].end_time.strftime('%Y-%m-%d'), [str(m) for m in run])
+        for run in windows
+    ]
+
+
+def construct_ipc_api_url(start_date, end_date, classification='IPC31', chunk_size=1 << 20, use_store=True):
+    """
+    Retrieve IPC phase data from the FEWS NET API through an incremental local store.
+
+    The store (Data/External/IPC/store/<classification>.parquet) records which months it holds.
+    Only the missing months of the requested window are downloaded; they replace any rows for
+    those months in the store. Months are matched on 'reporting_date'. The selection is also
+    saved as Data/External/IPC/ipc_data.parquet.
+
+    Args:
+        start_date (str): Start date in YYYY-MM-DD format.
+        end_date (str): End date in YYYY-MM-DD format.
+        classification (str): The IPC classification scale (IPC20, IPC30 or IPC31).
+        chunk_size (int): Number of bytes written per chunk while streaming the response.
+        use_store (bool): Set to False to download the whole window and leave the store untouched.
+
+    Returns:
+        DataFrame: The typed IPC table for the requested window.
+    """
     project_root = Path(__file__).resolve().parent.parent
 
     #--------------------------------------
-    # Location to save geodataframe (as shapefile)
+    # Location to save the IPC table
     #--------------------------------------
 
-    ref_ipc_csv_path = project_root / 'Data' / 'External' / 'IPC' 
+    ref_ipc_csv_path = project_root / 'Data' / 'External' / 'IPC'
+    store_path = ref_ipc_csv_path / 'store'
+    os.makedirs(store_path, exist_ok=True)
     print(f'saving to folder: {ref_ipc_csv_path}')
 
-    # Parameters
-    params = {
-        "start_date": start_date, # Specify in prompt (text) that the format must follow YYYY-MM-DD format
-        "end_date": end_date, # Specify in prompt (text) that the format must follow YYYY-MM-DD format
-        "classification_scale": classification # Specify that is default (for this purpose the parameter should not be changed)
-    }
+    if not use_store:
+        ipc_data = download_ipc_window(start_date, end_date, classification, ref_ipc_csv_path / 'ipc_data.csv', chunk_size)
+        ipc_data.to_parquet(ref_ipc_csv_path / 'ipc_data.parquet', index=False)
+        return(ipc_data)
 
-    # Construct the URL manually to maintain the structure
-    url_csv = f"{base_url}?start_date={params['start_date']}&end_date={params['end_date']}&classification_scale={params['classification_scale']}"
-    print(f'The API call constructed: {url_csv}')
-    print()
-    print("Data downloaded and saved as ipc_data.csv to folder Data/External/ipc_data.csv")
-    print()
-    response = requests.get(url_csv, params=params)
-    print(response.text[:500])  # Print first 500 characters to see if it's a valid CSV
+    store_file = store_path / f'{classification}.parquet'
+    windows_file = store_path / f'{classification}_windows.json'
 
-    with open(f"{ref_ipc_csv_path}/ipc_data.csv", "wb") as file:
-        file.write(response.content)
+    stored = pd.read_parquet(store_file) if store_file.exists() else None
+    held_months = set()
+    if stored is not None and windows_file.exists():
+        with open(windows_file, 'r') as file:
+            held_months = set(json.load(file)['months'])
 
-    ipc_data = pd.read_csv(f"{ref_ipc_csv_path}/ipc_data.csv", delimiter=",")  # Adjust as needed
-    return(ipc_data)
+    windows = missing_month_windows(start_date, end_date, held_months)
+    if not windows:
+        print(f'All months between {start_date} and {end_date} are already held in {store_file}')
+
+    for window_start, window_end, months in windows:
+        print(f'Requesting missing window {window_start} to {window_end} ({len(months)} months)')
+        fetched = download_ipc_window(window_start, window_end, classification, store_path / f'{classification}_window.csv', chunk_size)
+
+        if stored is not None:
+            # Replace whatever the store held for the refreshed months
+            in_window = stored['reporting_date'].between(pd.Timestamp(window_start), pd.Timestamp(window_end))
+            stored = pd.concat([stored[~in_window], fetched], ignore_index=True)
+        else:
+            stored = fetched
+        held_months.update(months)
+
+    if windows:
+        # Concatenating categoricals with different categories falls back to object; restore them
+        for column in IPC_CATEGORICAL_COLUMNS:
+            if column in stored.columns:
+                stored[column] = stored[column].astype('category')
+        stored = stored.sort_values('reporting_date', kind='stable', ignore_index=True)
+        stored.to_parquet(store_file, index=False)
+        with open(windows_file, 'w') as file:
+            json.dump({'months': sorted(held_months)}, file, indent=2)
 
+    # Select the requested window from the store
+    selected = stored['reporting_date'].between(pd.Timestamp(start_date), pd.Timestamp(end_date))
+    ipc_data = stored[selected].reset_index(drop=True)
+    for column in IPC_CATEGORICAL_COLUMNS:
+        if column in ipc_data.columns:
+            ipc_data[column] = ipc_data[column].cat.remove_unused_categories()
+
+    ipc_data.to_parquet(ref_ipc_csv_path / 'ipc_data.parquet', index=False)
+
+    print()
+    print("Data saved as ipc_data.parquet to folder Data/External/IPC")
+    print()
+    return(ipc_data)
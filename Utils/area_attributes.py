@@ -1,27 +1,68 @@
-def define_area_attributes(intersected_gdf):
+import numpy as np
+import shapely
+
+from Utils.pg_grid_index import AUTHALIC_RADIUS_M
+from Utils.pg_cell_area import load_cell_area_lookup
+
+
+def equal_area_sq_km(geometry):
+    """
+    Compute the area of lon/lat geometries in square kilometres with an equal-area projection.
+
+    Coordinates are projected on the fly to the Lambert cylindrical equal-area projection on the
+    authalic sphere (x = R * lon, y = R * sin(lat)); the geometries themselves are not modified.
 
-    #-----------------------------------------------------------------------
-    # Ensure the GeoDataFrame has a projected CRS for accurate area calculations
-    if not intersected_gdf.crs.is_projected:
-        intersected_gdf = intersected_gdf.to_crs(epsg=3857)
-    #-----------------------------------------------------------------------
+    Args:
+        geometry (GeoSeries or array of shapely geometries): Geometries in EPSG:4326.
 
-    # Calculate the area and store it in a new attribute 'area_sq_km'
-    intersected_gdf['Feature_area_sq_km'] = intersected_gdf.geometry.area / 1e6  # Convert from square meters to square kilometers
+    Returns:
+        numpy.ndarray: The area of each geometry in square kilometres.
+    """
+    def to_equal_area(coords):
+        radians = np.radians(coords)
+        return np.column_stack([AUTHALIC_RADIUS_M * radians[:, 0], AUTHALIC_RADIUS_M * np.sin(radians[:, 1])])
+
+    projected = shapely.transform(np.asarray(geometry), to_equal_area)
+    return shapely.area(projected) / 1e6
+
+
+def define_area_attributes(intersected_gdf):
+    """
+    Add the fragment area, the PG cell area and the share of the cell each fragment covers.
 
-    # Group by 'pg_id' and calculate the sum of areas for each group
-    cell_area = intersected_gdf.groupby('pg_id')['Feature_area_sq_km'].sum().reset_index()
+    Areas are equal-area areas on the authalic sphere computed from the EPSG:4326 coordinates; the
+    geometries are not reprojected. 'Cell_Area' is the area of the whole grid cell and
+    'Cell_land_area' its land area (NaN when unknown), both from the persisted cell area table
+    (see Utils/pg_cell_area.py). 'Proportional_area' is the share of the cell's land area covered by
+    each fragment, so coastal cells are not diluted by sea; it falls back to 'Cell_Area' where the
+    land area is unknown or zero.
 
-    # Rename the area column to 'Cell_Area'
-    cell_area.rename(columns={'Feature_area_sq_km': 'Cell_Area'}, inplace=True)
+    Args:
+        intersected_gdf (GeoDataFrame): The intersected fragments with a 'pg_id' column.
 
-    # Merge the 'Cell_Area' back into the original GeoDataFrame
-    intersected_gdf = intersected_gdf.merge(cell_area, on='pg_id')
+    Returns:
+        GeoDataFrame: The fragments with 'Feature_area_sq_km', 'Cell_Area', 'Cell_land_area' and
+                      'Proportional_area' columns.
+    """
+    # Reuse the fragment areas from intersect_on_grid when present
+    if 'Feature_area_sq_km' not in intersected_gdf.columns:
+        geometry = intersected_gdf.geometry
+        if intersected_gdf.crs is not None and intersected_gdf.crs != "EPSG:4326":
+            geometry = geometry.to_crs("EPSG:4326")
+        intersected_gdf['Feature_area_sq_km'] = equal_area_sq_km(geometry)
 
-    intersected_gdf['Proportional_area'] = intersected_gdf['Feature_area_sq_km'] / intersected_gdf['Cell_Area']
+    # Area (and land area) of the whole grid cell of each fragment, looked up from the cell area table
+    cell_area, land_area = load_cell_area_lookup()
+    pg_ids = intersected_gdf['pg_id'].to_numpy(dtype=np.int64)
+    intersected_gdf['Cell_Area'] = cell_area[pg_ids]
+    intersected_gdf['Cell_land_area'] = land_area[pg_ids]
 
+    # The land mask is pixel-based, so the boundaries may cover a little more land than it holds:
+    # never divide by less than the area the fragments of the cell cover together
+    covered = intersected_gdf.groupby('pg_id')['Feature_area_sq_km'].transform('sum')
+    land_denominator = np.maximum(intersected_gdf['Cell_land_area'], covered)
+    denominator = land_denominator.where(intersected_gdf['Cell_land_area'] > 0, intersected_gdf['Cell_Area'])
 
-    if intersected_gdf.crs != "EPSG:4326":
-        intersected_gdf = intersected_gdf.to_crs("EPSG:4326") 
+    intersected_gdf['Proportional_area'] = intersected_gdf['Feature_area_sq_km'] / denominator
 
-    return(intersected_gdf)
\ No newline at end of file
+    return(intersected_gdf)
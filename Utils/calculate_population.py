@@ -1,47 +1,158 @@
 import rasterio
-from rasterio.mask import mask
+from affine import Affine
+from rasterio.features import rasterize
 import numpy as np
+import shapely
 
-def calculate_feature_population(clipped_path, intersected_gdf):
+
+def _non_overlapping_layers(geometry):
+    """
+    Split geometries into layers whose members do not overlap, so each layer can be burned into a
+    single label raster. A partition (e.g. fnid x cell fragments) fits in one layer.
+
+    Args:
+        geometry (array): Shapely geometries.
+
+    Returns:
+        numpy.ndarray: The layer number of each geometry.
+    """
+    tree = shapely.STRtree(geometry)
+    left, right = tree.query(geometry, predicate='intersects')
+    pairs = left < right
+    left, right = left[pairs], right[pairs]
+
+    # Geometries that only share an edge can share a layer; interiors must not intersect
+    overlapping = shapely.relate_pattern(geometry[left], geometry[right], 'T********')
+    left, right = left[overlapping], right[overlapping]
+
+    layers = np.zeros(len(geometry), dtype=np.int64)
+    if len(left) == 0:
+        return layers
+
+    # Greedy colouring of the overlap graph
+    neighbours = {}
+    for a, b in zip(left, right):
+        neighbours.setdefault(a, []).append(b)
+        neighbours.setdefault(b, []).append(a)
+    for i in sorted(neighbours):
+        taken = {layers[j] for j in neighbours[i] if j < i}
+        layer = 0
+        while layer in taken:
+            layer += 1
+        layers[i] = layer
+    return layers
+
+
+def _exact_feature_sums(geometry, data, valid, transform):
+    """
+    Sum raster values per geometry weighting each pixel by the fraction of it the geometry covers.
+
+    Pixels crossed by the geometry boundary are intersected exactly with the geometry; pixels
+    inside the boundary count fully.
+    """
+    pixel_width, pixel_height = transform.a, -transform.e
+    pixel_area = pixel_width * pixel_height
+    sums = np.zeros(len(geometry))
+
+    for i, geom in enumerate(geometry):
+        # Window of the raster covering the geometry
+        minx, miny, maxx, maxy = geom.bounds
+        col0 = max(int(np.floor((minx - transform.c) / pixel_width)), 0)
+        row0 = max(int(np.floor((transform.f - maxy) / pixel_height)), 0)
+        col1 = min(int(np.ceil((maxx - transform.c) / pixel_width)), data.shape[1])
+        row1 = min(int(np.ceil((transform.f - miny) / pixel_height)), data.shape[0])
+        if col1 <= col0 or row1 <= row0:
+            continue
+        window_shape = (row1 - row0, col1 - col0)
+        window_transform = transform * Affine.translation(col0, row0)
+        window_data = data[row0:row1, col0:col1]
+        window_valid = valid[row0:row1, col0:col1]
+
+        inside = rasterize([(geom, 1)], out_shape=window_shape, transform=window_transform, fill=0, dtype='uint8').astype(bool)
+        edge = rasterize([(geom.boundary, 1)], out_shape=window_shape, transform=window_transform,
+                         fill=0, dtype='uint8', all_touched=True).astype(bool)
+
+        interior = inside & ~edge & window_valid
+        total = window_data[interior].sum(dtype=np.float64)
+
+        # Exact coverage fraction of the pixels crossed by the boundary
+        edge_rows, edge_cols = np.nonzero(edge & window_valid)
+        if len(edge_rows):
+            xs = window_transform.c + edge_cols * pixel_width
+            ys = window_transform.f - edge_rows * pixel_height
+            pixels = shapely.box(xs, ys - pixel_height, xs + pixel_width, ys)
+            fraction = shapely.area(shapely.intersection(geom, pixels)) / pixel_area
+            total += np.sum(window_data[edge_rows, edge_cols] * fraction, dtype=np.float64)
+
+        sums[i] = total
+    return sums
+
+
+def calculate_feature_population(population, intersected_gdf, exact_coverage=False):
     """
     Calculate the population sum for each feature in a GeoDataFrame using a clipped population raster.
 
+    All features are rasterized to a label grid over the population window and the population of each
+    label is summed in one vectorized pass (np.bincount). A pixel counts towards a feature when its
+    centre falls inside it, as with rasterio.mask. Overlapping features are burned in separate layers.
+
     Args:
-        clipped_path (str): Path to the clipped population raster file.
+        population (str or dict): Path to a clipped population raster file, or a population window
+                                  already held in memory (see process_geotiff.get_population_window).
         intersected_gdf (GeoDataFrame): A GeoDataFrame containing geometries to intersect with the raster.
+        exact_coverage (bool): Weight pixels crossed by a feature boundary by the exact fraction of the
+                               pixel the feature covers instead of using the pixel-centre rule.
 
     Returns:
         GeoDataFrame: The updated GeoDataFrame with 'feature_id' and 'feature_population' columns.
     """
     try:
-        # Create a new column in intersected_gdf to store the population sum
-        intersected_gdf['feature_population'] = 0
-
         # Add a unique 'feature_id' column based on the index
         intersected_gdf['feature_id'] = intersected_gdf.index
 
-        # Open the clipped population raster
-        with rasterio.open(clipped_path) as src:
-            # Iterate through each feature in the GeoDataFrame
-            for idx, row in intersected_gdf.iterrows():
-                # Get the geometry of the current feature
-                geom = [row['geometry']]
-
-                try:
-                    # Mask the raster with the feature's geometry
-                    out_image, out_transform = mask(src, geom, crop=True)
-                    
-                    # Flatten the masked raster and remove NoData values
-                    out_image = out_image[0]  # Assuming a single band raster
-                    out_image = out_image[out_image != src.nodata]
-                    
-                    # Sum the population values and assign to the GeoDataFrame
-                    population_sum = np.sum(out_image)
-                    intersected_gdf.at[idx, 'feature_population'] = population_sum
-
-                except Exception as e:
-                    # Handle any errors (e.g., empty geometries or mask issues)
-                    print(f"Error processing feature {idx}: {e}")
+        # Use the in-memory window, or open the clipped population raster
+        if isinstance(population, dict):
+            data, transform, nodata, crs = population['data'], population['transform'], population['nodata'], population['crs']
+        else:
+            with rasterio.open(population) as src:
+                data = src.read(1)
+                transform = src.transform
+                nodata = src.nodata
+                crs = src.crs
+
+        # Ensure the features are in the same CRS as the raster
+        geometries = intersected_gdf.geometry
+        if crs is not None and geometries.crs is not None and geometries.crs != crs:
+            geometries = geometries.to_crs(crs)
+
+        geometry = np.asarray(geometries.array, dtype=object)
+
+        # Pixels holding population: not NoData and finite
+        valid = np.isfinite(data)
+        if nodata is not None:
+            valid &= data != nodata
+
+        if exact_coverage:
+            feature_population = _exact_feature_sums(geometry, data, valid, transform)
+        else:
+            feature_population = np.zeros(len(geometry))
+            layers = _non_overlapping_layers(geometry)
+            for layer in np.unique(layers):
+                members = np.flatnonzero(layers == layer)
+
+                # Burn label i + 1 for feature i; 0 is background
+                labels = rasterize(
+                    ((geometry[i], i + 1) for i in members),
+                    out_shape=data.shape,
+                    transform=transform,
+                    fill=0,
+                    dtype='int32',
+                )
+                burned = valid & (labels > 0)
+                sums = np.bincount(labels[burned], weights=data[burned], minlength=len(geometry) + 1)
+                feature_population[members] = sums[members + 1]
+
+        intersected_gdf['feature_population'] = feature_population
 
         print("Population calculation completed successfully.")
         return intersected_gdf
@@ -49,19 +160,27 @@ def calculate_feature_population(clipped_path, intersected_gdf):
     except Exception as e:
         print(f"An error occurred: {e}")
         return None
-    
-def aggregate_population_to_pg(intersected_gdf):
+
+def aggregate_population_to_pg(intersected_gdf, population_lookup=None):
     """
     Group by 'pg_id', calculate the sum of population for each group,
     and merge the aggregated population back into the original GeoDataFrame.
 
+    With a population lookup the population of the whole cell is read from it instead.
+
     Args:
         intersected_gdf (GeoDataFrame): GeoDataFrame containing 'pg_id' and 'feature_population' columns.
+        population_lookup (numpy.ndarray or None): Population indexed by pg_id (see pg_population.load_population_lookup).
 
     Returns:
         GeoDataFrame: Updated GeoDataFrame with a new 'Cell_population' column.
     """
     try:
+        if population_lookup is not None:
+            intersected_gdf['Cell_population'] = population_lookup[intersected_gdf['pg_id'].to_numpy(dtype=np.int64)]
+            print("Cell populations looked up successfully.")
+            return intersected_gdf
+
         # Step 1: Group by 'pg_id' and sum the population for each group
         cell_population = intersected_gdf.groupby('pg_id')['feature_population'].sum().reset_index()
 
@@ -3,22 +3,25 @@ from pathlib import Path
 
 def pg_shapefile_exists(folder_path=None, shapefile_name = 'pg_viewser_extent.shp'):
     """
-    Check if a specific shapefile exists in a given folder, with a default programmatically generated path.
+    Check if the PG reference grid exists in a given folder, with a default programmatically generated path.
+
+    The grid counts as present when either the shapefile or its GeoParquet copy exists.
 
     Args:
         shapefile_name (str): The name of the shapefile (e.g., 'example.shp').
         folder_path (str, optional): The path to the folder to check. If None, a default folder path is used.
 
     Returns:
-        bool: True if the shapefile exists, False otherwise.
+        bool: True if the shapefile or GeoParquet file exists, False otherwise.
     """
     # Set the default folder path if none is provided
     if folder_path is None:
         project_root = Path(__file__).resolve().parent.parent
         folder_path = project_root / 'Data' / 'Processed' / 'extent_shapefile'
 
-    # Construct the full path to the shapefile
+    # Construct the full path to the shapefile and its GeoParquet copy
     shapefile_path = os.path.join(folder_path, shapefile_name)
+    parquet_path = os.path.splitext(shapefile_path)[0] + '.parquet'
 
-    # Check if the shapefile exists and return the result
-    return os.path.exists(shapefile_path)
\ No newline at end of file
+    # Check if either file exists and return the result
+    return os.path.exists(shapefile_path) or os.path.exists(parquet_path)
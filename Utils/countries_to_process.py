@@ -1,10 +1,11 @@
-def select_country_codes(ipc):
+def select_country_codes(ipc, selection=None):
     """
     Display a vertical list of available country codes and their associated country names.
     Prompt the user to select one or more country codes, or all countries.
 
     Args:
         ipc (DataFrame): The input DataFrame containing 'country_code' and 'country' columns.
+        selection (str, list or None): A preset selection ('All' or a list of country codes). Prompts if None.
 
     Returns:
         tuple: A tuple containing the filtered DataFrame and a list of selected country codes.
@@ -20,11 +21,16 @@ def select_country_codes(ipc):
     for code, name in country_dict.items():
         print(f"{code}: {name}")
 
-    # Step 4: Prompt the user for a selection
+    # Step 4: Prompt the user for a selection (or use the preset one)
     while True:
-        user_input = input(
-            "\nEnter one or more country codes separated by commas, or type 'All' to select all countries: "
-        ).strip().upper()
+        if selection is None:
+            user_input = input(
+                "\nEnter one or more country codes separated by commas, or type 'All' to select all countries: "
+            ).strip().upper()
+        elif isinstance(selection, str):
+            user_input = selection.strip().upper()
+        else:
+            user_input = ",".join(selection).upper()
 
         if user_input == "ALL":
             print("You selected all countries.")
@@ -36,6 +42,8 @@ def select_country_codes(ipc):
         # Validate the input
         invalid_codes = [code for code in selected_codes if code not in country_dict]
         if invalid_codes:
+            if selection is not None:
+                raise ValueError(f"Invalid country codes: {', '.join(invalid_codes)}.")
             print(f"Invalid country codes: {', '.join(invalid_codes)}. Please try again.")
         else:
             print("You selected the following countries:")
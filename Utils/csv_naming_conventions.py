@@ -1,6 +1,6 @@
 def apply_naming_convention(dates_to_process, selected_country_codes, process_selection):
     """
-    Generate a filename string based on the naming conventions for dates, country codes, and process selection.
+    Generate a name (without extension) based on the naming conventions for dates, country codes, and process selection.
 
     Args:
         dates_to_process (list): A list of dates (strings in YYYY-MM-DD format) to process.
@@ -8,7 +8,7 @@ def apply_naming_convention(dates_to_process, selected_country_codes, process_se
         process_selection (int): The selected process number.
 
     Returns:
-        str: A filename string following the naming convention.
+        str: A name following the naming convention, used for the output folder and the CSV export.
     """
     # Handle dates
     if len(dates_to_process) > 1:
@@ -25,6 +25,6 @@ def apply_naming_convention(dates_to_process, selected_country_codes, process_se
     process_selection_string = str(process_selection)
 
     # Combine all elements into the final naming string
-    filename = f"{date_string}_{country_codes_string}_{process_selection_string}.csv"
+    filename = f"{date_string}_{country_codes_string}_{process_selection_string}"
 
     return filename
\ No newline at end of file
@@ -1,10 +1,96 @@
 from Utils.access_population_resource import get_population_data, download_worldpop_data, check_if_population_local, get_url_for_year
-from Utils.process_geotiff import clip_and_save_geotiff
+from Utils.process_geotiff import get_population_window
 
 from Utils.calculate_population import calculate_feature_population, aggregate_population_to_pg
 
 from Utils.build_envelope import envelope_buffer
 
+from Utils.pg_cell_area import build_cell_area_table, land_area_missing
+from Utils.pg_population import default_population_lookup_path, load_population_lookup
+from Utils.population_manifest import load_population_manifest
+
+
+# Worker processes of a parallel run only read the population resources prepared by the parent
+_read_only = False
+
+
+def set_population_read_only(read_only=True):
+    """
+    Stop this process from downloading, ingesting or building population resources (used as the
+    initializer of the worker processes of a parallel run).
+    """
+    global _read_only
+    _read_only = read_only
+
+
+def prepare_population_data(year):
+    """
+    Make the population data of a year ready: download the WorldPop raster, ingest its tiled copy,
+    fill the land areas of the PG cell area table and build the PG population lookup, as needed.
+
+    In read-only processes (see set_population_read_only) nothing is written; missing resources
+    are reported instead.
+
+    Args:
+        year (int or str): The year for which population data is required (later years use 2020).
+
+    Returns:
+        str or None: Path to the population raster of the (adjusted) year, or None if it is not available.
+    """
+    year = int(year)
+
+    # Adjust year if it exceeds 2020
+    if year > 2020:
+        print("WorldPop data does not exceed 2020. "
+              "Incorporating population data from the most recent available year (2020).")
+        year = 2020
+
+    # Check if the population data for the adjusted year is available locally
+    pop_identified = check_if_population_local(year)
+
+    # If not available locally, download the data
+    if not pop_identified:
+        if _read_only:
+            print(f"Error: Population for {year} was not prepared before the workers started.")
+            return None
+
+        print(f"Population for {year} has not yet been downloaded...")
+        print("Locating WorldPop API link...")
+        url = get_url_for_year(year)
+        print(f"Retrieved URL: {url}")
+
+        if url:  # Ensure URL is not None
+            # Verify against the checksum and size the manifest holds for the year (from an earlier
+            # verified download, or pinned by hand); the download itself checks the advertised size
+            entry = load_population_manifest().get(year, {})
+            if 'sha256' not in entry:
+                print(f"No checksum is recorded for {year}; the download is verified against the size reported by the server.")
+            if download_worldpop_data(url, expected_sha256=entry.get('sha256'), expected_size=entry.get('size')) is None:
+                print("Error: The population download did not complete. Run again to resume it.")
+                return None
+            print("Downloaded WorldPop data!")
+        else:
+            print("Error: Failed to retrieve URL for the population data.")
+            return None
+
+    # Get the path to the population data
+    population_path = get_population_data(year, ingest=not _read_only)
+    print(f"Population data can be referenced in: {population_path}")
+    if population_path is None:
+        return None
+
+    # The first downloaded raster provides the land mask of the PG cell area table
+    if not pop_identified and land_area_missing():
+        build_cell_area_table(population_path)
+
+    # Priogrid-level population lookup of the year (built once, shared by all countries and dates)
+    if _read_only and not default_population_lookup_path(year).exists():
+        print(f"Error: The PG population lookup for {year} was not prepared before the workers started.")
+        return None
+    load_population_lookup(year, population_path)
+
+    return population_path
+
 
 
 # def engineer_population_attributes(year, country_code, intersected_gdf, envelope_gdf_buffered):
@@ -35,7 +121,7 @@ from Utils.build_envelope import envelope_buffer
 
 #     return(population_at_id_and_pg_level)
 
-def engineer_population_attributes(year, country_code, intersected_gdf, envelope_gdf_buffered):
+def engineer_population_attributes(year, country_code, intersected_gdf, envelope_gdf_buffered, exact_coverage=False):
     """
     Engineer population attributes for a given year, country, and intersected GeoDataFrame.
 
@@ -44,6 +130,8 @@ def engineer_population_attributes(year, country_code, intersected_gdf, envelope
         country_code (str): The country code for the target data.
         intersected_gdf (GeoDataFrame): The GeoDataFrame with intersected data.
         envelope_gdf_buffered (GeoDataFrame): Buffered envelope GeoDataFrame.
+        exact_coverage (bool): Weight boundary pixels by the exact fraction covered by each feature
+                               (see calculate_feature_population).
 
     Returns:
         DataFrame: A DataFrame with population attributes aggregated to priogrid levels.
@@ -52,37 +140,21 @@ def engineer_population_attributes(year, country_code, intersected_gdf, envelope
         # Ensure year is an integer
         year = int(year)
 
-        # Adjust year if it exceeds 2020
-        if year > 2020:
-            print("WorldPop data does not exceed 2020. "
-                  "Incorporating population data from the most recent available year (2020).")
-            year = 2020
-
-        # Check if the population data for the adjusted year is available locally
-        pop_identified = check_if_population_local(year)
-
-        # If not available locally, download the data
-        if not pop_identified:
-            print(f"Population for {year} has not yet been downloaded...")
-            print("Locating WorldPop API link...")
-            url = get_url_for_year(year)
-            print(f"Retrieved URL: {url}")
-
-            if url:  # Ensure URL is not None
-                download_worldpop_data(url)
-                print(f"Downloaded WorldPop data!")
-            else:
-                print("Error: Failed to retrieve URL for the population data.")
-                return None
+        # Download, ingest and build the population resources of the year if needed
+        population_path = prepare_population_data(year)
+        if population_path is None:
+            return None
+        year = min(year, 2020)
+
+        # Read the population under the envelope into memory (cached for the other dates of the year)
+        population_window = get_population_window(population_path, envelope_gdf_buffered, country_code, year)
 
-        # Get the path to the population data and clip it using the buffered envelope
-        population_path = get_population_data(year)
-        print(f"Population data can be referenced in: {population_path}")
-        clipped_path = clip_and_save_geotiff(population_path, envelope_gdf_buffered, country_code, year)
+        # Process ID-level population data from the raster window
+        population_at_id_level = calculate_feature_population(population_window, intersected_gdf, exact_coverage=exact_coverage)
 
-        # Process ID and priogrid-level population data
-        population_at_id_level = calculate_feature_population(clipped_path, intersected_gdf)
-        population_at_id_and_pg_level = aggregate_population_to_pg(population_at_id_level)
+        # Priogrid-level population from the global lookup of the year (built once, shared by all countries and dates)
+        population_lookup = load_population_lookup(year, population_path)
+        population_at_id_and_pg_level = aggregate_population_to_pg(population_at_id_level, population_lookup)
 
         # Calculate Proportion_population: feature_population / cell_population
         population_at_id_and_pg_level['Proportion_population'] = (
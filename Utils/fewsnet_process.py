@@ -1,3 +1,5 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import geopandas as gpd
 import pandas as pd
 from pathlib import Path
@@ -26,33 +28,223 @@ from Utils.area_attributes import define_area_attributes
 
 
 #Perform Intersection
-from Utils.perform_intersection import intersect
+from Utils.perform_intersection import intersect_on_grid
 from Utils.build_envelope import envelope_buffer
 
 
 #Define process to conver FEWSNET to PG
-from Utils.select_process import define_process
+from Utils.select_process import define_process, get_process_parameters
 from Utils.user_process_selection import get_process_selection
 
 
+# Shared fnid -> pg_id weights for the dates of a boundary set
+from Utils.fnid_pg_weights import boundary_set_hash, dissolve_boundary_set, get_fragment_table, population_year
+
+
 #Rejoin data to PG shapefile (GPD)
 from Utils.rejoin_pg_data import rejoin_to_pg
 
-from Utils.cumulative_population_attribution import engineer_population_attributes
+from Utils.cumulative_population_attribution import engineer_population_attributes, prepare_population_data, set_population_read_only
+from Utils.pg_cell_area import load_cell_area_lookup, prepare_cell_area_table
 from Utils.pg_country_extent import create_country_geodataframe
 from Utils.leftjoin_to_pg_country import left_join_geodataframes
 from Utils.select_dates import get_dates_to_process
 
 # Save the data
 from Utils.csv_naming_conventions import apply_naming_convention
+from Utils.write_results import export_csv, write_partitioned_results
+
+from Utils.run_config import DEFAULT_RUN_CONFIG
+
+# Checkpoints of completed (country, date) units
+from Utils.run_checkpoints import (
+    completed_unit, default_checkpoint_folder, load_run_manifest, load_unit_result, record_unit_failure,
+    run_identifier, save_unit_result, unit_input_hash, unit_key,
+)
+
+def process_country_date(country_code, country_name, processing_date, merged_df_current_lim, process_selection, process_params,
+                         exact_coverage=False):
+    """
+    Process one (country, reporting date) work unit: overlay, area, population, dissolve, rejoin and trim.
+
+    Units are independent of each other, so they can run in any order or in separate processes.
+
+    Args:
+        country_code (str): The FEWS NET country code.
+        country_name (str): The country name used to trim results to the PG country extent.
+        processing_date (str): The reporting date (YYYY-MM-DD).
+        merged_df_current_lim (GeoDataFrame): IPC values merged with boundaries for this date.
+        process_selection (int or str): The selected process number (1-6), or 'all'.
+        process_params (dict): Parameters from get_process_parameters.
+        exact_coverage (bool): Weight pixels crossed by a unit boundary by the exact covered fraction
+                               when attributing population (see calculate_feature_population).
+
+    Returns:
+        GeoDataFrame: The result for the unit on the PG cells of the country.
+    """
+    print()
+    print(f"Processing date: {processing_date} ({country_code})")
+    print()
+
+    # Extract the year from the current processing date
+    year = processing_date.split('-')[0]
+
+    # Generate a buffered envelope for the filtered dataset
+    envelope_gdf_buffered = envelope_buffer(merged_df_current_lim, distance=25000)
+
+    # Ensure only valid geometry types
+    merged_df_current_lim = merged_df_current_lim[merged_df_current_lim.geom_type.isin(['Polygon', 'MultiPolygon'])]
+
+    # Perform the intersection (cut the units along the PG grid lines)
+    intersected_gdf = intersect_on_grid(merged_df_current_lim)
+
+    # Ensure area attributes are defined
+    intersected_gdf = define_area_attributes(intersected_gdf)
+
+    # Check if the selected process requires population data
+    if process_selection in [5, 6, 'all']:
+        intersected_gdf = engineer_population_attributes(year, country_code, intersected_gdf, envelope_gdf_buffered, exact_coverage=exact_coverage)
+
+    # Define the process and generate the result
+    result = define_process(process_selection, intersected_gdf, process_params)
+
+    return _trim_to_country(result, country_code, country_name, processing_date)
+
+
+def _trim_to_country(result, country_code, country_name, processing_date, country_extents=None):
+    # Rejoin the result to the priogrid
+    # Applies the data frame containing a pg attribute to the spatial pg extent
+    result_gdf = rejoin_to_pg(result)
+
+    # Add processing_date and country_code fields to result_gdf
+    result_gdf['processing_date'] = processing_date
+    result_gdf['country_code'] = country_code
+
+    # Trim results to PG (viewser defined) country extent
+    year_int = int(processing_date.split('-')[0])
+    if country_extents is not None and year_int in country_extents:
+        gpd_country_extent_df = country_extents[year_int]
+    else:
+        gpd_country_extent_df = create_country_geodataframe(country_name, year_int, shapefile_path=None)
+        if country_extents is not None:
+            country_extents[year_int] = gpd_country_extent_df
+
+    print()
+
+    country_joined = left_join_geodataframes(gpd_country_extent_df, result_gdf)
+
+    print(f"Completed processing for {processing_date} ({country_code}).")
+    return country_joined
+
+
+def process_boundary_set(country_code, country_name, processing_dates, unit_gdfs, process_selection, process_params,
+                         exact_coverage=False):
+    """
+    Process all reporting dates of a country that share one boundary set.
+
+    The boundary set is intersected with the PG grid (and attributed population) once per
+    population year; see Utils/fnid_pg_weights.py. Results equal process_country_date for each date.
+
+    Args:
+        country_code (str): The FEWS NET country code.
+        country_name (str): The country name used to trim results to the PG country extent.
+        processing_dates (list): The reporting dates (YYYY-MM-DD).
+        unit_gdfs (list): IPC values merged with boundaries, one GeoDataFrame per date (same fnids and geometries).
+        process_selection (int or str): The selected process number (1-6), or 'all'.
+        process_params (dict): Parameters from get_process_parameters.
+        exact_coverage (bool): Exact pixel coverage for the population attribution (see process_country_date).
+
+    Returns:
+        list: The result of every date on the PG cells of the country, in the order of processing_dates.
+    """
+    print()
+    print(f"Processing {len(processing_dates)} date(s) sharing one boundary set ({country_code})")
+    print()
+
+    # Population attribution depends on the (WorldPop) year; area attribution does not
+    with_population = process_selection in [5, 6, 'all']
+    groups = {}
+    for index, processing_date in enumerate(processing_dates):
+        key = population_year(processing_date) if with_population else None
+        groups.setdefault(key, []).append(index)
+
+    results = [None] * len(processing_dates)
+    country_extents = {}
+    for indices in groups.values():
+        first = unit_gdfs[indices[0]]
+        year = processing_dates[indices[0]].split('-')[0]
+
+        # Generate a buffered envelope for the boundary set
+        envelope_gdf_buffered = envelope_buffer(first, distance=25000)
+
+        fragments = get_fragment_table(
+            country_code, first[['fnid', first.geometry.name]], year, envelope_gdf_buffered, with_population, exact_coverage=exact_coverage,
+        )
+        dissolved = dissolve_boundary_set(
+            fragments, [unit_gdfs[i] for i in indices], [processing_dates[i] for i in indices], process_selection, process_params,
+        )
+
+        for index, result in zip(indices, dissolved):
+            results[index] = _trim_to_country(result, country_code, country_name, processing_dates[index], country_extents)
+
+    return results
+
 
-def run_fewsnet_processing_workflow(path):
+def _process_unit_group(group):
+    # Module-level wrapper for the units of one boundary set; a single unit keeps the per-date path
+    if len(group) == 1:
+        return [process_country_date(**group[0])]
+    return process_boundary_set(
+        group[0]['country_code'],
+        group[0]['country_name'],
+        [unit['processing_date'] for unit in group],
+        [unit['merged_df_current_lim'] for unit in group],
+        group[0]['process_selection'],
+        group[0]['process_params'],
+        exact_coverage=group[0]['exact_coverage'],
+    )
+
+
+def run_fewsnet_processing_workflow(path, workers=1, config=None, resume=True, csv=None, exact_coverage=None):
     """
     Execute the full workflow for processing FEWSNET data, including IPC classifications, 
     country-level processing, and final results aggregation.
+
+    All user input (countries, scenarios, dates and process parameters) is collected first. The
+    resulting (country, date) work units are then processed sequentially or, with workers > 1,
+    across a process pool. Results are gathered in country/date order either way.
+
+    With a run configuration (see Utils/run_config.py) no prompts are shown at all, so runs can be
+    scheduled and batched unattended.
+
+    Results are saved as Parquet partitioned by country and processing date, with the PG cell
+    polygons written once (see Utils/write_results.py); a single CSV is exported on request.
+
+    Every completed unit is checkpointed as it finishes (Data/Processed/checkpoints/<run id>, with a
+    run manifest). Re-running the same classification, date range, scenario and process skips the
+    completed units and retries the failed ones. A failing unit no longer stops the run.
+
+    Args:
+        path (str or Path): Path prefix of the output folder (and CSV); the naming convention is appended.
+        workers (int): Number of worker processes. 1 (default) processes the units in this process.
+        config (dict or None): A run configuration from load_run_config. If None, the user is prompted.
+        resume (bool): Reuse the checkpoints of earlier runs. If False, every unit is processed again.
+        csv (bool or None): Also export the results as one CSV file. Defaults to the 'csv' key of the
+                            run configuration (no export in interactive mode).
+        exact_coverage (bool or None): Attribute population with exact pixel coverage of the unit
+                                       boundaries. Defaults to the 'exact_coverage' key of the run configuration.
+
+    Returns:
+        DataFrame: The results for all countries and dates.
     """
     path = Path(path)
 
+    # Without a run configuration every parameter is prompted for (None = ask)
+    interactive = config is None
+    if interactive:
+        config = {key: None for key in DEFAULT_RUN_CONFIG}
+        config['scenario'] = 'Current Situation'
+
 
     if pg_shapefile_exists():
         print("The PG reference shapefile has already been produced!")
@@ -64,8 +256,8 @@ def run_fewsnet_processing_workflow(path):
         
         provide_reference_frame()
 
-    ipc_classification = select_ipc_classification()
-    s, e = get_date_range()
+    ipc_classification = select_ipc_classification(config['ipc_classification'])
+    s, e = get_date_range(config['start_date'], config['end_date'])
     ipc = construct_ipc_api_url(s, e, ipc_classification)
     print(list(ipc))
     #Print all country_codes:
@@ -73,13 +265,17 @@ def run_fewsnet_processing_workflow(path):
 
     endyear = int(e.split('-')[0])
 
-    icp_country_result = plot_fewsnet_scenario_coverage(ipc, endyear)
+    icp_country_result = plot_fewsnet_scenario_coverage(ipc, endyear, generate=config['coverage_plot'])
 
-    ipc_country, selected_country_codes = select_country_codes(ipc)
+    ipc_country, selected_country_codes = select_country_codes(ipc, config['countries'])
 
-    process_selection = get_process_selection()
+    process_selection = get_process_selection(selection=config['process'])
+    process_params = get_process_parameters(process_selection, preset=config['process_params'])
+    if exact_coverage is None:
+        exact_coverage = bool(config['exact_coverage'])
 
-    all_country_results = []
+    # Build the (country, date) work units
+    units = []
 
     for country_code in selected_country_codes:
 
@@ -87,7 +283,7 @@ def run_fewsnet_processing_workflow(path):
 
         country_name = ipc.loc[ipc['country_code'] == country_code, 'country'].iloc[0]
 
-        print(f"Processing country: {country_code} ({country_name})")
+        print(f"Preparing country: {country_code} ({country_name})")
 
         boundaries = construct_boundary_api_url(country_code)
 
@@ -97,71 +293,144 @@ def run_fewsnet_processing_workflow(path):
 
         evaluate_merge_completness(merge, ipc_filtered, unmatched)
 
-        scenario = define_scenario(merge)
+        scenario = define_scenario(merge, config['scenario'], interactive=interactive)
+        if scenario is None:
+            print(f"Skipping {country_code}: scenario '{config['scenario']}' is not available.")
+            continue
 
         merged_df_current = gpd.GeoDataFrame(scenario, geometry='geometry')
 
-        plot_historical_ipc(merged_df_current)
-
-        result_dfs = []
+        plot_historical_ipc(merged_df_current, generate=config['historical_maps'])
 
         # Get unique dates from the dataset
         dataset_dates = sorted(merged_df_current['reporting_date'].unique().tolist())
         print(dataset_dates)
 
-        dates_to_process = get_dates_to_process(dataset_dates)
-
-        # Loop through each date in the dataset_dates
-        for i, processing_date in enumerate(dates_to_process):  # Enumerate gives both index and value
-            print()
-            print(f"Processing date: {processing_date}")
-            print()
-
-            # Extract the year from the current processing date
-            year = processing_date.split('-')[0]
-            year_int = int(processing_date.split('-')[0])
-
-            # Filter the dataset for the current date
-            merged_df_current_lim = merged_df_current[merged_df_current['reporting_date'] == processing_date]
-
-            # Generate a buffered envelope for the filtered dataset
-            envelope_gdf_buffered = envelope_buffer(merged_df_current_lim, distance=25000)
-
-            # Ensure only valid geometry types
-            merged_df_current_lim = merged_df_current_lim[merged_df_current_lim.geom_type.isin(['Polygon', 'MultiPolygon'])]
-
-            # Perform the intersection
-            intersected_gdf = intersect(merged_df_current_lim)
-
-            # Ensure area attributes are defined
-            intersected_gdf = define_area_attributes(intersected_gdf)
-
-            # Check if the selected process requires population data
-            if process_selection in [5, 6]:
-                intersected_gdf = engineer_population_attributes(year, country_code, intersected_gdf, envelope_gdf_buffered)
-
-            # Define the process and generate the result
-            result = define_process(process_selection, intersected_gdf)
-
-            # Rejoin the result to the priogrid
-            # Applies the data frame containing a pg attribute to the spatial pg extent
-            result_gdf = rejoin_to_pg(result)
-            
-            # Add processing_date and country_code fields to result_gdf
-            result_gdf['processing_date'] = processing_date
-            result_gdf['country_code'] = country_code
+        dates_to_process = get_dates_to_process(dataset_dates, config['dates'])
+
+        for processing_date in dates_to_process:
+            units.append({
+                'country_code': country_code,
+                'country_name': country_name,
+                'processing_date': processing_date,
+                'merged_df_current_lim': merged_df_current[merged_df_current['reporting_date'] == processing_date],
+                'process_selection': process_selection,
+                'process_params': process_params,
+                'exact_coverage': exact_coverage,
+            })
+
+    # The run is identified by the parameters that determine the unit results
+    run_parameters = {
+        'ipc_classification': ipc_classification,
+        'start_date': s,
+        'end_date': e,
+        'scenario': config['scenario'],
+        'process': process_selection,
+        'process_params': process_params,
+    }
+    if exact_coverage:
+        # Only recorded when enabled, so the run ids of earlier runs stay valid
+        run_parameters['exact_coverage'] = True
+    checkpoint_folder = default_checkpoint_folder(run_identifier(run_parameters))
+    manifest = load_run_manifest(checkpoint_folder, run_parameters)
+
+    keys = [unit_key(unit['country_code'], unit['processing_date']) for unit in units]
+    input_hashes = [unit_input_hash(unit['merged_df_current_lim']) for unit in units]
+
+    # Completed units are loaded from their checkpoints
+    unit_results = {}
+    pending = []
+    for index, (key, input_hash) in enumerate(zip(keys, input_hashes)):
+        if resume and completed_unit(checkpoint_folder, manifest, key, input_hash):
+            unit_results[key] = load_unit_result(checkpoint_folder, manifest, key)
+        else:
+            pending.append(index)
+
+    print(f"Run checkpoints: {checkpoint_folder}")
+    print(f"{len(units) - len(pending)} of {len(units)} country x date units already completed.")
+
+    def checkpoint(index, result, error=None):
+        # Persist each unit as soon as it finishes, in the main process only
+        key, input_hash = keys[index], input_hashes[index]
+        if error is None and result is None:
+            error = "the unit returned no result"
+        if error is not None:
+            print(f"Unit {key} failed: {error}")
+            record_unit_failure(checkpoint_folder, manifest, key, input_hash, str(error))
+            return
+        save_unit_result(checkpoint_folder, manifest, key, input_hash, result)
+        unit_results[key] = result
+
+    # Shared resources are downloaded and built here, once, before any worker starts; the workers only read them
+    prepare_cell_area_table()
+    load_cell_area_lookup()
+    if process_selection in [5, 6, 'all'] and pending:
+        for year in sorted({population_year(units[index]['processing_date']) for index in pending}):
+            try:
+                available = prepare_population_data(year) is not None
+            except Exception as error:
+                print(f"An error occurred while preparing the population data for {year}: {error}")
+                available = False
+            if not available:
+                for index in pending:
+                    if population_year(units[index]['processing_date']) == year:
+                        checkpoint(index, None, f"population data for {year} is not available")
+                pending = [index for index in pending if population_year(units[index]['processing_date']) != year]
+
+    # Dates of a country with the same boundary set are processed together, sharing one intersection
+    # with the PG grid; units whose fnids repeat keep the per-date path
+    groups = {}
+    for index in pending:
+        unit_gdf = units[index]['merged_df_current_lim']
+        if unit_gdf['fnid'].is_unique:
+            group_key = (units[index]['country_code'], boundary_set_hash(unit_gdf))
+        else:
+            group_key = index
+        groups.setdefault(group_key, []).append(index)
+
+    # Split large boundary sets so every worker gets a share of the units
+    chunk_size = max(1, -(-len(pending) // workers))
+    groups = [group[start:start + chunk_size] for group in groups.values() for start in range(0, len(group), chunk_size)]
+
+    # Process the remaining work units
+    def checkpoint_group(group, results, error=None):
+        # A failed group marks all of its units failed
+        for position, index in enumerate(group):
+            checkpoint(index, None if error is not None else results[position], error)
+
+    print(f"Processing {len(pending)} country x date units ({len(groups)} boundary sets) with {workers} worker(s).")
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=set_population_read_only) as executor:
+            futures = {executor.submit(_process_unit_group, [units[index] for index in group]): group for group in groups}
+            for future in as_completed(futures):
+                try:
+                    checkpoint_group(futures[future], future.result())
+                except Exception as error:
+                    checkpoint_group(futures[future], None, error)
+    else:
+        for group in groups:
+            try:
+                checkpoint_group(group, _process_unit_group([units[index] for index in group]))
+            except Exception as error:
+                checkpoint_group(group, None, error)
 
-            # Trim results to PG (viewser defined) country extent
-            gpd_country_extent_df = create_country_geodataframe(country_name, year_int, shapefile_path=None)
-            
-            print()
+    failed = [key for key in keys if key not in unit_results]
+    if failed:
+        print(f"{len(failed)} unit(s) failed: {', '.join(failed)}")
+        print("Run the same configuration again to retry them; completed units will be reused.")
 
-            country_joined=left_join_geodataframes(gpd_country_extent_df, result_gdf)
+    all_country_results = []
 
-            # Append the result_gdf to the list
-            result_dfs.append(country_joined)
+    for country_code in selected_country_codes:
 
-            print(f"Completed processing for {processing_date}. Result saved.")
+        # Results in country/date order; cells of the country extent without IPC data belong to the unit too
+        result_dfs = [
+            unit_results[key].assign(country_code=unit['country_code'], processing_date=unit['processing_date'])
+            for unit, key in zip(units, keys)
+            if unit['country_code'] == country_code and key in unit_results
+        ]
+        if not result_dfs:
+            continue
 
         # Concatenate the results for the current country
         country_result_df = pd.concat(result_dfs, ignore_index=True)
@@ -179,14 +448,23 @@ def run_fewsnet_processing_workflow(path):
         # Append to the all-country results list
         all_country_results.append(country_result_df)
 
+    if not all_country_results:
+        print("No results were produced.")
+        return None
+
     # Concatenate results for all countries
     final_result_df = pd.concat(all_country_results, ignore_index=True)
 
     # Naming Conventions:
     naming_conventions = apply_naming_convention(dates_to_process, selected_country_codes, process_selection)
 
-    csv_path_with_naming = path.with_name(path.name + naming_conventions + '.csv')
+    output_folder = path.with_name(path.name + naming_conventions)
+    print(f'The result will be saved to {output_folder}')
 
     # The final_result_df now contains data for all countries and dates
-    final_result_df.to_csv(csv_path_with_naming)
-    return(final_result_df)
\ No newline at end of file
+    write_partitioned_results(final_result_df, output_folder)
+    if csv is None:
+        csv = config['csv']
+    if csv:
+        export_csv(final_result_df, output_folder.with_name(output_folder.name + '.csv'))
+    return(final_result_df)
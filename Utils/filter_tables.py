@@ -1,3 +1,5 @@
+import pandas as pd
+
 
 def desirable_attributes(ipc_data, spatial_boundaries):
     # Subset desirable fields from gdf__fscunits
@@ -6,6 +8,15 @@ def desirable_attributes(ipc_data, spatial_boundaries):
     # Subset desirable fields from subset_df
     subset_IPC_attributes = ipc_data[['fnid', 'scenario_name', 'value', 'reporting_date']]
 
+    # The date loop works on YYYY-MM-DD strings, so format parsed reporting dates back to text
+    if pd.api.types.is_datetime64_any_dtype(subset_IPC_attributes['reporting_date']):
+        subset_IPC_attributes = subset_IPC_attributes.assign(
+            reporting_date=subset_IPC_attributes['reporting_date'].dt.strftime('%Y-%m-%d')
+        )
+
+    # The IPC table stores 'value' as a nullable Int8; the weighting processes expect floats (NaN for missing)
+    subset_IPC_attributes = subset_IPC_attributes.assign(value=subset_IPC_attributes['value'].astype('float64'))
+
     return(subset_IPC_attributes, gdf_fscunits_attributes)
 
     # Display the first few rows to verify
@@ -13,4 +24,4 @@ def desirable_attributes(ipc_data, spatial_boundaries):
     print(gdf_fscunits_attributes.head())
 
     print("\nsubset_df subset:")
-    print(subset_IPC_attributes.head())
\ No newline at end of file
+    print(subset_IPC_attributes.head())
@@ -0,0 +1,253 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from Utils.area_attributes import define_area_attributes
+from Utils.cumulative_population_attribution import engineer_population_attributes
+from Utils.perform_intersection import intersect_on_grid
+from Utils.process_pop_area_weights import assign_percentile_weights, calculate_population_percentiles
+from Utils.select_process import ALL_PROCESSES, define_process
+
+
+# Processes whose dissolved value is a fixed weighted sum of the unit values, so every reporting
+# date of a boundary set follows from one fnid -> pg_id weight matrix
+LINEAR_PROCESSES = [1, 5, 6]
+
+# Fragment tables held in memory per (country_code, boundary set, population year), least recently used first
+_fragment_tables = OrderedDict()
+FRAGMENT_TABLE_CACHE_SIZE = 8
+
+
+def polygon_boundaries(unit_gdf):
+    """
+    The units of a reporting date that are cut along the PG grid: 'fnid' and a non-empty
+    (Multi)Polygon geometry. Units without a matching boundary have no geometry and are left out.
+    """
+    geometry = unit_gdf.geometry
+    valid = geometry.notna() & ~geometry.is_empty & geometry.geom_type.isin(['Polygon', 'MultiPolygon'])
+    return unit_gdf.loc[valid, ['fnid', geometry.name]]
+
+
+def boundary_set_hash(unit_gdf):
+    """
+    Fingerprint the boundary set of a reporting date: the fnids and geometries of its polygons
+    (see polygon_boundaries).
+
+    Reporting dates with the same fingerprint share one intersection with the PG grid.
+
+    Args:
+        unit_gdf (GeoDataFrame): The IPC values merged with boundaries for one date.
+
+    Returns:
+        str: A hexadecimal digest.
+    """
+    boundaries = polygon_boundaries(unit_gdf).sort_values('fnid', kind='stable')
+    digest = hashlib.sha1()
+    for fnid, wkb in zip(boundaries['fnid'].astype(str), shapely.to_wkb(boundaries.geometry.to_numpy())):
+        digest.update(fnid.encode('utf-8'))
+        digest.update(wkb)
+    return digest.hexdigest()
+
+
+def population_year(processing_date):
+    """
+    The WorldPop year used for a reporting date (WorldPop data ends in 2020).
+    """
+    return min(int(processing_date.split('-')[0]), 2020)
+
+
+def get_fragment_table(country_code, boundaries_gdf, year, envelope_gdf, with_population, exact_coverage=False):
+    """
+    Intersect a boundary set with the PG grid once and keep the fragment table in memory.
+
+    Args:
+        country_code (str): The FEWS NET country code.
+        boundaries_gdf (GeoDataFrame): The units of the boundary set ('fnid' and geometry, one row per fnid).
+        year (int): The year whose population is attributed (ignored without population).
+        envelope_gdf (GeoDataFrame): Buffered envelope of the boundary set, for the population window.
+        with_population (bool): Also attribute population (needed by processes 5 and 6).
+        exact_coverage (bool): Attribute population with exact pixel coverage (see calculate_feature_population).
+
+    Returns:
+        GeoDataFrame: One row per (fnid, pg_id) fragment with the area (and population) attributes.
+    """
+    key = (country_code, boundary_set_hash(boundaries_gdf), (min(int(year), 2020), exact_coverage) if with_population else None)
+    if key in _fragment_tables:
+        _fragment_tables.move_to_end(key)
+        return _fragment_tables[key]
+
+    # Ensure only valid geometry types, as hashed
+    fragments = intersect_on_grid(polygon_boundaries(boundaries_gdf))
+    fragments = define_area_attributes(fragments)
+    if with_population:
+        fragments = engineer_population_attributes(year, country_code, fragments, envelope_gdf, exact_coverage=exact_coverage)
+        if fragments is None:
+            raise RuntimeError(f"Population attributes could not be engineered for {country_code} ({year}).")
+
+    _fragment_tables[key] = fragments
+    while len(_fragment_tables) > FRAGMENT_TABLE_CACHE_SIZE:
+        _fragment_tables.popitem(last=False)
+    return fragments
+
+
+def fragment_weights(fragments, process_selection, process_params):
+    """
+    Weight of every fragment in the dissolved value of its cell for a linear process.
+
+    The dissolved value of a cell is sum(weight * value) over its fragments, as in the process
+    implementations: Proportional_area for process 1, population or area proportion for process 5
+    and the percentile-bucketed blend for process 6. Fragments whose weighted value would be
+    missing contribute nothing, as the grouped sums skip them.
+
+    Args:
+        fragments (DataFrame): The fragment table (see get_fragment_table).
+        process_selection (int): 1, 5 or 6.
+        process_params (dict): Parameters of the process (see get_process_parameters).
+
+    Returns:
+        numpy.ndarray: The weight of every fragment.
+    """
+    if process_selection == 1:
+        weights = fragments['Proportional_area'].to_numpy(dtype=float)
+
+    elif process_selection == 5:
+        filled = fragments[['pg_id', 'Proportion_population', 'Proportional_area', 'Cell_population']].fillna(0)
+        grouped = filled.groupby('pg_id')
+        use_population = (grouped['Proportion_population'].transform('max') > 0) | (grouped['Cell_population'].transform('max') > 0)
+        weights = np.where(use_population, filled['Proportion_population'], filled['Proportional_area']).astype(float)
+
+    elif process_selection == 6:
+        percentiles = calculate_population_percentiles(fragments, column='Cell_population', percentiles=process_params['thresholds'])
+        weight_population, weight_area = assign_percentile_weights(fragments['Cell_population'], percentiles, process_params['weights'])
+        weights = (
+            weight_population * fragments['Proportion_population'].to_numpy(dtype=float) +
+            weight_area * fragments['Proportional_area'].to_numpy(dtype=float)
+        )
+
+    else:
+        raise ValueError(f"Process {process_selection} is not a linear process.")
+
+    return np.nan_to_num(weights, nan=0.0)
+
+
+def build_weight_matrix(fragments, fnids, weights):
+    """
+    Assemble the sparse fnid -> pg_id weight matrix in coordinate form, duplicates summed.
+
+    Args:
+        fragments (DataFrame): The fragment table with 'pg_id' and 'fnid'.
+        fnids (Index): The fnids of the value matrix (columns of the matrix).
+        weights (array): The weight of every fragment.
+
+    Returns:
+        dict: 'pg_ids' (sorted rows), 'row' and 'col' (indices of the non-zeros) and 'weight'.
+    """
+    pg_ids, row = np.unique(fragments['pg_id'].to_numpy(), return_inverse=True)
+    col = fnids.get_indexer(fragments['fnid'])
+
+    # Sum the fragments of the same (pg_id, fnid) pair; entries stay sorted by row
+    pairs = row.astype(np.int64) * len(fnids) + col
+    unique_pairs, inverse = np.unique(pairs, return_inverse=True)
+    return {
+        'pg_ids': pg_ids,
+        'row': unique_pairs // len(fnids),
+        'col': unique_pairs % len(fnids),
+        'weight': np.bincount(inverse, weights=weights, minlength=len(unique_pairs)),
+    }
+
+
+def sparse_product(matrix, values):
+    """
+    Multiply the weight matrix with an fnid x date value matrix: every date in one pass.
+
+    Args:
+        matrix (dict): The weight matrix (see build_weight_matrix).
+        values (numpy.ndarray): fnid x date values, missing values as 0.
+
+    Returns:
+        numpy.ndarray: pg_id x date dissolved values.
+    """
+    # No fragments (no usable polygons in the boundary set): no cells
+    if len(matrix['row']) == 0:
+        return np.zeros((0, values.shape[1]))
+
+    contributions = matrix['weight'][:, None] * values[matrix['col']]
+    starts = np.flatnonzero(np.r_[True, matrix['row'][1:] != matrix['row'][:-1]])
+    return np.add.reduceat(contributions, starts, axis=0)
+
+
+def dissolve_boundary_set(fragments, unit_gdfs, dates, process_selection, process_params):
+    """
+    Produce the dissolved results of every reporting date of one boundary set.
+
+    Processes 1, 5 and 6 pivot the IPC values to an fnid x date matrix and apply the weight
+    matrix once for all dates. Processes 2-4 reuse the fragment table and only attach each date's
+    values before running the process.
+
+    Args:
+        fragments (GeoDataFrame): The fragment table of the boundary set (see get_fragment_table).
+        unit_gdfs (list): The IPC values merged with boundaries, one GeoDataFrame per date.
+        dates (list): The reporting dates, aligned with unit_gdfs.
+        process_selection (int or str): The selected process number (1-6), or 'all'.
+        process_params (dict): Parameters from get_process_parameters.
+
+    Returns:
+        list: One result DataFrame per date, as define_process returns it.
+    """
+    processes = ALL_PROCESSES if process_selection == 'all' else [process_selection]
+    table = pd.DataFrame(fragments.drop(columns=fragments.geometry.name))
+
+    # fnid x date value matrix
+    values = pd.concat(
+        [unit_gdf.set_index('fnid')['value'].rename(date) for unit_gdf, date in zip(unit_gdfs, dates)],
+        axis=1,
+    ).astype(float)
+    fnids = values.index
+
+    per_process = {}
+    for process in processes:
+        params = process_params[process] if process_selection == 'all' else process_params
+
+        if process in LINEAR_PROCESSES:
+            matrix = build_weight_matrix(table, fnids, fragment_weights(table, process, params))
+            dissolved = sparse_product(matrix, values.fillna(0).to_numpy())
+
+            if process == 1:
+                per_process[process] = [
+                    pd.DataFrame({'pg_id': matrix['pg_ids'], 'dissolved_value': dissolved[:, i]}) for i in range(len(dates))
+                ]
+            else:
+                # Plain sum of the fragment values for comparison
+                counts = build_weight_matrix(table, fnids, np.ones(len(table)))
+                original = sparse_product(counts, values.fillna(0).to_numpy())
+                per_process[process] = [
+                    pd.DataFrame({'pg_id': matrix['pg_ids'], 'final_weighted_value': dissolved[:, i], 'original_sum_value': original[:, i]})
+                    for i in range(len(dates))
+                ]
+        else:
+            results = []
+            for unit_gdf, date in zip(unit_gdfs, dates):
+                # Fragments in the row order of the date's units, as a per-date intersection would give them
+                rank = pd.Series(np.arange(len(unit_gdf)), index=unit_gdf['fnid'].to_numpy())
+                ordered = table.iloc[np.argsort(rank.loc[table['fnid']].to_numpy(), kind='stable')]
+                ordered = ordered.assign(value=values[date].loc[ordered['fnid']].to_numpy()).reset_index(drop=True)
+                results.append(define_process(process, ordered, params))
+            per_process[process] = results
+
+    if process_selection != 'all':
+        return per_process[process_selection]
+
+    # Side by side columns per process, as define_all_processes gives them
+    combined = []
+    for i in range(len(dates)):
+        merged = None
+        for process in processes:
+            result = per_process[process][i]
+            value_column = 'dissolved_value' if 'dissolved_value' in result.columns else 'final_weighted_value'
+            result = result[['pg_id', value_column]].rename(columns={value_column: f'process_{process}'})
+            merged = result if merged is None else merged.merge(result, on='pg_id', how='outer')
+        combined.append(merged)
+    return combined
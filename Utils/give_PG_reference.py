@@ -1,62 +1,74 @@
-import pandas as pd
 from pathlib import Path
 
-import geopandas as gpd
-import pandas as pd
-from shapely.geometry import Polygon
-import os 
+import numpy as np
+import os
 
+from Utils.pg_cell_area import build_cell_area_table
+from Utils.pg_grid_index import grid_shape, pg_cells
 
-# Define the function to create a 0.5x0.5 degree grid cell around a center point
-def create_grid_cell(lat, lon, cell_size=0.5):
-    half_size = cell_size / 2
-    # Define the corners of the grid cell
-    return Polygon([
-        (lon - half_size, lat - half_size),  # Bottom-left
-        (lon + half_size, lat - half_size),  # Bottom-right
-        (lon + half_size, lat + half_size),  # Top-right
-        (lon - half_size, lat + half_size),  # Top-left
-        (lon - half_size, lat - half_size)   # Close the polygon
-    ])
 
-from ingester3.extensions import *
+def build_reference_grid(cell_size=0.5):
+    """
+    Build the global PG reference grid in a single vectorized pass.
 
-def provide_reference_frame():
+    Cells are numbered like PRIO-GRID: 'pg_id' starts at 1 in the south-west corner and increases
+    eastwards along each row, then northwards row by row. With the default 0.5 degree cell size
+    this reproduces the 720 x 360 PRIO-GRID lattice.
 
+    Args:
+        cell_size (float): Cell size in degrees. Must divide 360 and 180 evenly.
+
+    Returns:
+        GeoDataFrame: One row per cell with 'pg_id', 'lat', 'long' (cell centre) and 'geometry' (EPSG:4326).
+    """
+    nrows, ncols = grid_shape(cell_size)
+    return pg_cells(np.arange(1, nrows * ncols + 1), cell_size)
+
+
+def provide_reference_frame(cell_size=0.5, write_shapefile=False):
+    """
+    Build the PG reference grid and save it to Data/Processed/extent_shapefile, together with the
+    table of cell areas and land areas (pg_cell_area.parquet).
+
+    Args:
+        cell_size (float): Cell size in degrees. Defaults to the 0.5 degree PRIO-GRID resolution.
+        write_shapefile (bool): Also write pg_viewser_extent.shp next to the GeoParquet file.
+
+    Returns:
+        GeoDataFrame: The generated PG reference grid.
+    """
     project_root = Path(__file__).resolve().parent.parent
 
     #--------------------------------------
-    # Location to save geodataframe (as shapefile)
+    # Location to save geodataframe (as GeoParquet)
     #--------------------------------------
 
-    ref_shapefile_path = project_root / 'Data' / 'Processed' / 'extent_shapefile' 
+    ref_shapefile_path = project_root / 'Data' / 'Processed' / 'extent_shapefile'
     os.makedirs(ref_shapefile_path, exist_ok=True)
 
     # ------------------------
     # Construct PG scaffolder
     # ------------------------
 
-    #add a print() line when building the scaffolders as this may take several minutes
     print()
-    print('Generating empty PG shapefile saved to \FEWSNET\Data\Processed\extent_shapefile.')
-    print('This is expected to take several minutes...')
+    print('Generating empty PG reference grid saved to \\FEWSNET\\Data\\Processed\\extent_shapefile.')
     print()
-    
-    pg = pd.DataFrame.pg.new_structure()
 
-    pg['lat'] = pg.pg.lat
-    pg['long'] = pg.pg.lon
+    gdf = build_reference_grid(cell_size)
+
+    # GeoParquet is the primary format; the shapefile is only written on request as it is slow to produce
+    gdf.to_parquet(f"{ref_shapefile_path}/pg_viewser_extent.parquet")
+    if write_shapefile:
+        gdf.to_file(f"{ref_shapefile_path}/pg_viewser_extent.shp")
+
+    # Cell and land areas only depend on the grid (and the land mask), so compute them once here
+    if cell_size == 0.5:
+        build_cell_area_table(cell_size=cell_size)
+
+    return gdf
 
-    geometry = pg.apply(lambda row: create_grid_cell(row['lat'], row['long']), axis=1)
-    gdf = gpd.GeoDataFrame(pg, geometry=geometry, crs="EPSG:4326")
-    # ------------------------
-    # WHY DO DO FOLLOW THIS ORDER:
-    # apply lat and long first 
-    gdf.to_file(f"{ref_shapefile_path}/pg_viewser_extent.shp")  # Save as a shapefile if needed
-    # ------------------------
 # Ensure this runs only when executed directly, not when imported
 if __name__ == "__main__":
-    process_selection = provide_reference_frame()
-    print(f"You selected process: {process_selection}")
+    reference_grid = provide_reference_frame()
+    print(f"Generated {len(reference_grid)} PG cells.")
 # ----------------------------------------------------------------------------------------------------
-
@@ -1,12 +1,25 @@
-def get_date_range():
+def get_date_range(start_date=None, end_date=None):
     """
     Prompt the user for a start date and an end date in the YYYY-MM-DD format.
 
+    Args:
+        start_date (str or None): A preset start date (e.g. from a run configuration). Prompts if None.
+        end_date (str or None): A preset end date. Prompts if None.
+
     Returns:
         tuple: A tuple containing start_date and end_date as strings.
     """
     import datetime
 
+    # Preset dates are validated instead of prompting
+    if start_date is not None and end_date is not None:
+        datetime.datetime.strptime(start_date, "%Y-%m-%d")
+        datetime.datetime.strptime(end_date, "%Y-%m-%d")
+        if end_date < start_date:
+            raise ValueError("End date must be later than or equal to the start date.")
+        print(f'Your selected date range is: {start_date} to {end_date}')
+        return start_date, end_date
+
     # Prompt for start date
     while True:
         print("Please supply a start date in the YYYY-MM-DD format (e.g., 2004-01-01):")
@@ -38,22 +51,18 @@ def get_date_range():
 
     return start_date, end_date
 
-def select_ipc_classification():
+def select_ipc_classification(selection=None):
     """
     Prompt the user to select an IPC classification from IPC 2.0, IPC 3.0, or IPC 3.1.
     Converts the selection to the corresponding format (IPC20, IPC30, or IPC31).
     Allows the user to quit the process by typing 'q'.
 
+    Args:
+        selection (str or None): A preset classification (e.g. 'IPC 3.1' or 'IPC31'). Prompts if None.
+
     Returns:
         str: The selected IPC classification in the format IPC20, IPC30, or IPC31, or None if the process is quit.
     """
-    print("Type 'q' at any time to quit the process.")
-    print("\nGeneral date ranges associated with each IPC classification:")
-    print("1. IPC 2.0: ~2004–2012")
-    print("2. IPC 3.0: ~2013–2018")
-    print("3. IPC 3.1: ~2019–Present")
-    print("\nPlease choose an IPC classification from the options above.")
-
     # Mapping for user input to program-specific classifications
     classification_mapping = {
         "IPC 2.0": "IPC20",
@@ -61,6 +70,22 @@ def select_ipc_classification():
         "IPC 3.1": "IPC31",
     }
 
+    # A preset classification is validated instead of prompting
+    if selection is not None:
+        selection = selection.strip().upper()
+        if selection in classification_mapping.values():
+            return selection
+        if selection in classification_mapping:
+            return classification_mapping[selection]
+        raise ValueError(f"Invalid IPC classification '{selection}'. Use IPC 2.0, IPC 3.0 or IPC 3.1.")
+
+    print("Type 'q' at any time to quit the process.")
+    print("\nGeneral date ranges associated with each IPC classification:")
+    print("1. IPC 2.0: ~2004–2012")
+    print("2. IPC 3.0: ~2013–2018")
+    print("3. IPC 3.1: ~2019–Present")
+    print("\nPlease choose an IPC classification from the options above.")
+
     while True:
         selected_ipc_classification = input("Enter your choice (IPC 2.0, IPC 3.0, IPC 3.1): ").strip().upper()
         if selected_ipc_classification.lower() == 'q':
@@ -1,9 +1,14 @@
 import geopandas as gpd
-import os
+import numpy as np
+import pandas as pd
+import shapely
+
+from Utils.area_attributes import equal_area_sq_km
+from Utils.pg_grid_index import CELL_SIZE, grid_shape, pg_cells_for_geodataframe, pg_id_to_rowcol, rowcol_to_pg_id
 
 def intersect(gdf2):
     """
-    Perform the intersection of two GeoDataFrames using a dynamically constructed path.
+    Perform the intersection of the PG reference grid with a GeoDataFrame.
 
     Args:
         gdf2 (GeoDataFrame): The second GeoDataFrame.
@@ -12,13 +17,13 @@ def intersect(gdf2):
         GeoDataFrame: The resulting GeoDataFrame after performing the intersection.
     """
     try:
-        # Dynamically construct the path to extent_shapefile directory
-        script_dir = os.path.dirname(os.path.abspath(__file__))  # Directory of the current script
-        base_dir = os.path.abspath(os.path.join(script_dir, "../"))  # Navigate to FEWSnet root
-        shapefile_path = os.path.join(base_dir, "Data/Processed/extent_shapefile/pg_viewser_extent.shp")
-        
-        # Load the first GeoDataFrame
-        gdf1 = gpd.read_file(shapefile_path)
+        # Only the PG cells within the extent of gdf2 are generated
+        gdf1 = pg_cells_for_geodataframe(gdf2)
+
+        # Keep the candidate cells that intersect at least one feature (spatial index query),
+        # so the overlay scales with the area of the boundary set rather than its bounding box
+        cell_index, _ = gdf2.sindex.query(gdf1.geometry, predicate='intersects')
+        gdf1 = gdf1.iloc[np.unique(cell_index)]
         
         # Perform the intersection
         intersected_gdf = gpd.overlay(gdf1, gdf2, how='intersection')
@@ -29,4 +34,126 @@ def intersect(gdf2):
         return intersected_gdf
     except Exception as e:
         print(f"An error occurred during the intersection: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def _polygonal_parts(geometry):
+    """
+    Reduce clipped geometries to their polygonal part; anything without area becomes None.
+    """
+    geometry = np.asarray(geometry, dtype=object).copy()
+
+    # Repair the (rare) invalid clip results before extracting polygons
+    invalid = ~shapely.is_valid(geometry) & ~shapely.is_empty(geometry)
+    if invalid.any():
+        geometry[invalid] = shapely.make_valid(geometry[invalid])
+
+    # Collections can carry lines or points along cell edges; keep only their polygons
+    collections = shapely.get_type_id(geometry) == 7
+    for i in np.flatnonzero(collections):
+        parts = shapely.get_parts(geometry[i])
+        polygons = parts[np.isin(shapely.get_type_id(parts), [3, 6])]
+        geometry[i] = shapely.union_all(polygons) if len(polygons) else None
+
+    keep = np.isin(shapely.get_type_id(geometry), [3, 6]) & (shapely.area(geometry) > 0)
+    geometry[~keep] = None
+    return geometry
+
+
+def intersect_on_grid(gdf2, cell_size=CELL_SIZE):
+    """
+    Intersect polygons with the PG lattice by cutting them along the grid lines.
+
+    PG cells are axis-aligned rectangles, so instead of a generic polygon overlay each polygon is
+    clipped to the latitude bands it spans and every band piece is then clipped to the longitude
+    bands it spans (GEOS rectangle clipping, vectorized over all pieces per band). The result
+    matches intersect() up to floating point tolerance.
+
+    Args:
+        gdf2 (GeoDataFrame): Polygon features (e.g. FEWS NET units with 'fnid' and 'value').
+        cell_size (float): Cell size in degrees. Defaults to the PRIO-GRID resolution.
+
+    Returns:
+        GeoDataFrame: One row per (feature, pg_id) fragment with 'pg_id', 'lat', 'long', the
+        attributes of gdf2, the clipped 'geometry' (EPSG:4326) and its 'Feature_area_sq_km'.
+    """
+    if gdf2.crs is not None and not gdf2.crs.equals("EPSG:4326"):
+        gdf2 = gdf2.to_crs("EPSG:4326")
+
+    geometry = np.asarray(gdf2.geometry.array, dtype=object)
+    nrows, ncols = grid_shape(cell_size)
+
+    if len(geometry) == 0:
+        columns = ['pg_id', 'lat', 'long'] + [c for c in gdf2.columns if c != gdf2.geometry.name]
+        return gpd.GeoDataFrame(columns=columns + ['Feature_area_sq_km'], geometry=[], crs="EPSG:4326")
+
+    # Row range spanned by each feature
+    bounds = shapely.bounds(geometry)
+    row_min = np.clip(np.floor((bounds[:, 1] + 90) / cell_size), 0, nrows - 1).astype(np.int64)
+    row_max = np.clip(np.ceil((bounds[:, 3] + 90) / cell_size) - 1, 0, nrows - 1).astype(np.int64)
+    row_max = np.maximum(row_max, row_min)
+
+    # Pass 1: cut every feature into latitude bands
+    band_feature, band_row, band_geometry = [], [], []
+    for row in range(row_min.min(), row_max.max() + 1):
+        features = np.flatnonzero((row_min <= row) & (row_max >= row))
+        south = -90 + row * cell_size
+        pieces = shapely.clip_by_rect(geometry[features], -180, south, 180, south + cell_size)
+        keep = ~shapely.is_empty(pieces)
+        band_feature.append(features[keep])
+        band_row.append(np.full(keep.sum(), row))
+        band_geometry.append(pieces[keep])
+
+    band_feature = np.concatenate(band_feature)
+    band_row = np.concatenate(band_row)
+    band_geometry = np.concatenate(band_geometry)
+
+    # Column range spanned by each band piece
+    band_bounds = shapely.bounds(band_geometry)
+    col_min = np.clip(np.floor((band_bounds[:, 0] + 180) / cell_size), 0, ncols - 1).astype(np.int64)
+    col_max = np.clip(np.ceil((band_bounds[:, 2] + 180) / cell_size) - 1, 0, ncols - 1).astype(np.int64)
+    col_max = np.maximum(col_max, col_min)
+
+    # Pass 2: cut every band piece into longitude bands, which yields one fragment per cell
+    fragment_feature, fragment_row, fragment_col, fragment_geometry = [], [], [], []
+    for col in range(col_min.min(), col_max.max() + 1):
+        pieces_in_col = np.flatnonzero((col_min <= col) & (col_max >= col))
+        west = -180 + col * cell_size
+        pieces = shapely.clip_by_rect(band_geometry[pieces_in_col], west, -90, west + cell_size, 90)
+        keep = ~shapely.is_empty(pieces)
+        fragment_feature.append(band_feature[pieces_in_col][keep])
+        fragment_row.append(band_row[pieces_in_col][keep])
+        fragment_col.append(np.full(keep.sum(), col))
+        fragment_geometry.append(pieces[keep])
+
+    fragment_feature = np.concatenate(fragment_feature)
+    fragment_row = np.concatenate(fragment_row)
+    fragment_col = np.concatenate(fragment_col)
+    fragment_geometry = _polygonal_parts(np.concatenate(fragment_geometry))
+
+    # Drop slivers that only touched a grid line
+    keep = pd.notna(fragment_geometry)
+    fragment_feature = fragment_feature[keep]
+    fragment_geometry = fragment_geometry[keep]
+    pg_id = rowcol_to_pg_id(fragment_row[keep], fragment_col[keep], cell_size)
+
+    # Order fragments by feature, then by cell
+    order = np.lexsort((pg_id, fragment_feature))
+    fragment_feature = fragment_feature[order]
+    pg_id = pg_id[order]
+    fragment_geometry = fragment_geometry[order]
+
+    rows, cols = pg_id_to_rowcol(pg_id, cell_size)
+    attributes = gdf2.drop(columns=gdf2.geometry.name).iloc[fragment_feature].reset_index(drop=True)
+    cells = pd.DataFrame({
+        'pg_id': pg_id,
+        'lat': -90 + rows * cell_size + cell_size / 2,
+        'long': -180 + cols * cell_size + cell_size / 2,
+    })
+
+    intersected_gdf = gpd.GeoDataFrame(
+        pd.concat([cells, attributes], axis=1),
+        geometry=fragment_geometry,
+        crs="EPSG:4326",
+    )
+    intersected_gdf['Feature_area_sq_km'] = equal_area_sq_km(intersected_gdf.geometry)
+    return intersected_gdf
@@ -0,0 +1,240 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.windows import Window
+
+from Utils.access_population_resource import get_population_data
+from Utils.population_manifest import default_population_folder, load_population_manifest
+from Utils.pg_grid_index import AUTHALIC_RADIUS_M, CELL_SIZE, grid_shape, pg_cell_area_sq_km
+
+
+def default_cell_area_path():
+    """
+    Path of the PG cell area table written next to the PG reference grid.
+
+    Returns:
+        Path: Data/Processed/extent_shapefile/pg_cell_area.parquet relative to the project root.
+    """
+    project_root = Path(__file__).resolve().parent.parent
+    return project_root / 'Data' / 'Processed' / 'extent_shapefile' / 'pg_cell_area.parquet'
+
+
+def find_population_raster(save_folder=None):
+    """
+    Find the most recent global WorldPop raster that has been downloaded, from the population manifest.
+
+    The raster is resolved through access_population_resource.get_population_data, so the land mask
+    is read from the same tiled copy as the population values.
+
+    Args:
+        save_folder (str or None): The folder where the rasters are stored. Defaults to Data/External/Population.
+
+    Returns:
+        str or None: The path of the raster, or None if no raster has been downloaded yet.
+    """
+    folder = default_population_folder() if save_folder is None else Path(save_folder)
+    if not os.path.exists(folder):
+        return None
+
+    manifest = load_population_manifest(save_folder)
+    years = sorted(year for year, entry in manifest.items() if 'file' in entry and os.path.exists(folder / entry['file']))
+    return get_population_data(years[-1], save_folder) if years else None
+
+
+def sum_raster_per_cell(raster_path, cell_size=CELL_SIZE, block_rows=256, pixel_area=False):
+    """
+    Sum the valid pixels of a global lon/lat raster per PG cell.
+
+    Pixels are assigned to the cell containing their centre. The raster is read in blocks of rows
+    so it never has to fit in memory.
+
+    Args:
+        raster_path (str or Path): Path to a global lon/lat raster.
+        cell_size (float): Cell size in degrees.
+        block_rows (int): Number of raster rows read at a time.
+        pixel_area (bool): Sum the true area of the valid pixels (square kilometres on the authalic
+                           sphere) instead of their values.
+
+    Returns:
+        numpy.ndarray: The sums indexed by pg_id (index 0 is unused).
+    """
+    nrows, ncols = grid_shape(cell_size)
+    sums = np.zeros(nrows * ncols + 1)
+
+    with rasterio.open(raster_path) as src:
+        transform = src.transform
+        nodata = src.nodata
+
+        # PG column of every raster column and area factor of a pixel
+        lon = transform.c + (np.arange(src.width) + 0.5) * transform.a
+        pg_cols = np.clip(np.floor((lon + 180) / cell_size).astype(np.int64), 0, ncols - 1)
+        pixel_width = np.radians(abs(transform.a))
+
+        for row0 in range(0, src.height, block_rows):
+            height = min(block_rows, src.height - row0)
+            data = src.read(1, window=Window(0, row0, src.width, height))
+
+            valid = np.isfinite(data)
+            if nodata is not None:
+                valid &= data != nodata
+
+            # Latitude band and PG row of every raster row in the block
+            top = transform.f + (row0 + np.arange(height)) * transform.e
+            bottom = top + transform.e
+            pg_rows = np.clip(np.floor(((top + bottom) / 2 + 90) / cell_size).astype(np.int64), 0, nrows - 1)
+
+            rows, cols = np.nonzero(valid)
+            pg_ids = pg_rows[rows] * ncols + pg_cols[cols] + 1
+            if pixel_area:
+                row_area = AUTHALIC_RADIUS_M ** 2 * pixel_width * np.abs(np.sin(np.radians(top)) - np.sin(np.radians(bottom))) / 1e6
+                weights = row_area[rows]
+            else:
+                weights = data[rows, cols].astype(np.float64)
+            sums += np.bincount(pg_ids, weights=weights, minlength=len(sums))
+
+    return sums
+
+
+def land_area_from_raster(raster_path, cell_size=CELL_SIZE, block_rows=256):
+    """
+    Sum the area of the valid (land) pixels of a global population raster per PG cell.
+
+    WorldPop rasters hold NoData over water, so their valid-pixel mask is a land mask. Each pixel
+    is weighted by its true area on the authalic sphere.
+
+    Args:
+        raster_path (str or Path): Path to a global lon/lat raster.
+        cell_size (float): Cell size in degrees.
+        block_rows (int): Number of raster rows read at a time.
+
+    Returns:
+        numpy.ndarray: Land area in square kilometres indexed by pg_id (index 0 is unused).
+    """
+    return sum_raster_per_cell(raster_path, cell_size, block_rows, pixel_area=True)
+
+
+def build_cell_area_table(population_path=None, cell_size=CELL_SIZE, save_path=None):
+    """
+    Compute and save the area and land area of every PG cell.
+
+    Cell areas are exact; land areas come from the valid-pixel mask of a WorldPop raster and are
+    left empty (NaN) when no raster has been downloaded yet.
+
+    Args:
+        population_path (str or None): The WorldPop raster for the land mask. Defaults to the most
+                                       recent downloaded raster (see find_population_raster).
+        cell_size (float): Cell size in degrees.
+        save_path (str or None): Where to write the table. Defaults to default_cell_area_path().
+
+    Returns:
+        DataFrame: 'pg_id', 'cell_area_sq_km' and 'land_area_sq_km' for every cell.
+    """
+    save_path = default_cell_area_path() if save_path is None else Path(save_path)
+    nrows, ncols = grid_shape(cell_size)
+    pg_ids = np.arange(1, nrows * ncols + 1)
+
+    table = pd.DataFrame({'pg_id': pg_ids, 'cell_area_sq_km': pg_cell_area_sq_km(pg_ids, cell_size)})
+
+    if population_path is None:
+        population_path = find_population_raster()
+
+    if population_path is not None:
+        print(f"Computing PG land areas from the valid pixels of: {population_path}")
+        land_area = land_area_from_raster(population_path, cell_size)[1:]
+        # Pixels are assigned by their centre, so clip the rare overshoot at cell edges
+        table['land_area_sq_km'] = np.minimum(land_area, table['cell_area_sq_km'].to_numpy())
+    else:
+        print("No WorldPop raster has been downloaded yet; PG land areas are left empty.")
+        table['land_area_sq_km'] = np.nan
+
+    # Write atomically; workers may read the table while it is rebuilt
+    os.makedirs(save_path.parent, exist_ok=True)
+    partial_path = save_path.with_name(save_path.name + f'.{os.getpid()}.part')
+    table.to_parquet(partial_path, index=False)
+    os.replace(partial_path, save_path)
+    print(f"Saved the PG cell area table to: {save_path}")
+
+    clear_cell_area_lookup()
+    return table
+
+
+def prepare_cell_area_table(path=None):
+    """
+    Make the PG cell area table ready before any area attributes are computed: build it if it does
+    not exist yet, or fill its land areas once a WorldPop raster has been downloaded.
+
+    Runs in the main process of a workflow, before the workers start; load_cell_area_lookup only reads.
+
+    Args:
+        path (str or None): Path to the cell area table. Defaults to default_cell_area_path().
+
+    Returns:
+        Path: The path of the table.
+    """
+    path = default_cell_area_path() if path is None else Path(path)
+    if not path.exists() or (land_area_missing(path) and find_population_raster() is not None):
+        build_cell_area_table(save_path=path)
+    return path
+
+
+@lru_cache(maxsize=None)
+def _load_lookup(path):
+    if not path.exists():
+        raise FileNotFoundError(f"The PG cell area table {path} has not been built; "
+                                "run pg_cell_area.prepare_cell_area_table (or give_PG_reference.provide_reference_frame) first.")
+
+    table = pd.read_parquet(path)
+    pg_ids = table['pg_id'].to_numpy()
+
+    # Arrays indexed directly by pg_id
+    cell_area = np.full(pg_ids.max() + 1, np.nan)
+    land_area = np.full(pg_ids.max() + 1, np.nan)
+    cell_area[pg_ids] = table['cell_area_sq_km'].to_numpy()
+    land_area[pg_ids] = table['land_area_sq_km'].to_numpy()
+    return cell_area, land_area
+
+
+def load_cell_area_lookup(path=None):
+    """
+    Return the cell area and land area arrays indexed by pg_id, loading the table once per process.
+
+    The table is not built here (see prepare_cell_area_table). Callers must treat the arrays as read-only.
+
+    Args:
+        path (str or None): Path to the cell area table. Defaults to default_cell_area_path().
+
+    Returns:
+        tuple: (cell_area, land_area) numpy arrays in square kilometres, indexed by pg_id.
+
+    Raises:
+        FileNotFoundError: If the table has not been prepared.
+    """
+    path = default_cell_area_path() if path is None else Path(path)
+    return _load_lookup(path.resolve())
+
+
+def land_area_missing(path=None):
+    """
+    Check whether the cell area table still lacks land areas (no WorldPop raster when it was built).
+
+    Args:
+        path (str or None): Path to the cell area table. Defaults to default_cell_area_path().
+
+    Returns:
+        bool: True if the table exists without land areas.
+    """
+    path = default_cell_area_path() if path is None else Path(path)
+    if not path.exists():
+        return False
+    return pd.read_parquet(path, columns=['land_area_sq_km'])['land_area_sq_km'].isna().all()
+
+
+def clear_cell_area_lookup():
+    """
+    Drop the in-memory cell area arrays, e.g. after the table has been rebuilt.
+    """
+    _load_lookup.cache_clear()
@@ -1,8 +1,9 @@
 import pandas as pd
 import geopandas as gpd
-from pathlib import Path
 from ingester3.extensions import *
 
+from Utils.pg_grid_index import pg_cells
+
 
 def create_country_geodataframe(country_name, year, shapefile_path=None):
     """
@@ -11,24 +12,13 @@ def create_country_geodataframe(country_name, year, shapefile_path=None):
     Args:
         country_name (str): The name of the country to filter.
         year (int): The year to filter.
-        shapefile_path (str, optional): Path to the reference shapefile. Defaults to a constructed path.
+        shapefile_path (str, optional): Path to a reference shapefile. Defaults to None, in which case only the
+                                        cells of the country are generated from the PG lattice.
 
     Returns:
         gpd.GeoDataFrame: A GeoDataFrame containing priogrid and geometry for the specified country and year.
     """
     try:
-        # Construct the default shapefile path if none is provided
-        if shapefile_path is None:
-            project_root = Path(__file__).resolve().parent.parent
-            shapefile_path = project_root / 'Data' / 'Processed' / 'extent_shapefile' / 'pg_viewser_extent.shp'
-
-        # Load the shapefile
-        print()
-        print(f"Loading shapefile from: {shapefile_path}.")
-        print(f'We will use this geodataframe to define an extent that matches global pg_ids to those located in {country_name}.')
-        print()
-        gpd_df = gpd.read_file(shapefile_path)
-
         # Generate priogrid data for Africa (up to max year)
         new_country_year = pd.DataFrame.cy.new_africa(max_year=year + 1)
         new_country_year['name'] = new_country_year.c.name
@@ -44,7 +34,14 @@ def create_country_geodataframe(country_name, year, shapefile_path=None):
         # Get priogrid IDs
         filtered_df_pg = filtered_df.cy.pg_id
 
-        # Merge priogrid IDs with the shapefile data
+        # Generate the PG cells of the country (or read them from a supplied shapefile)
+        if shapefile_path is None:
+            gpd_df = pg_cells(filtered_df_pg['pg_id'])
+        else:
+            print(f"Loading shapefile from: {shapefile_path}.")
+            gpd_df = gpd.read_file(shapefile_path)
+
+        # Merge priogrid IDs with the PG cells
         merged_df = pd.merge(filtered_df_pg, gpd_df, on='pg_id', how='inner')
 
         # Convert to GeoDataFrame if 'geometry' column exists
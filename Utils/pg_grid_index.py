@@ -0,0 +1,183 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+
+# PRIO-GRID is a regular lattice: 0.5 degree cells, 720 columns x 360 rows, numbered from 1 in the
+# south-west corner eastwards along each row and then northwards.
+CELL_SIZE = 0.5
+
+# Radius of the sphere with the same surface area as the WGS84 ellipsoid (metres)
+AUTHALIC_RADIUS_M = 6371007.181
+
+
+def grid_shape(cell_size=CELL_SIZE):
+    """
+    Number of rows and columns of a global lattice with the given cell size.
+
+    Args:
+        cell_size (float): Cell size in degrees. Must divide 360 and 180 evenly.
+
+    Returns:
+        tuple: (nrows, ncols).
+    """
+    ncols = int(round(360 / cell_size))
+    nrows = int(round(180 / cell_size))
+    if not np.isclose(ncols * cell_size, 360) or not np.isclose(nrows * cell_size, 180):
+        raise ValueError(f"Cell size {cell_size} does not divide the globe into whole rows and columns.")
+    return nrows, ncols
+
+
+def rowcol_to_pg_id(row, col, cell_size=CELL_SIZE):
+    """
+    Convert zero-based row (from the south) and column (from the west) indices to pg_id.
+
+    Args:
+        row (int or array): Row index.
+        col (int or array): Column index.
+        cell_size (float): Cell size in degrees.
+
+    Returns:
+        int or array: The pg_id(s).
+    """
+    _, ncols = grid_shape(cell_size)
+    return np.asarray(row) * ncols + np.asarray(col) + 1
+
+
+def pg_id_to_rowcol(pg_id, cell_size=CELL_SIZE):
+    """
+    Convert pg_id(s) to zero-based (row, col) indices.
+
+    Args:
+        pg_id (int or array): The pg_id(s).
+        cell_size (float): Cell size in degrees.
+
+    Returns:
+        tuple: (row, col) integer arrays.
+    """
+    _, ncols = grid_shape(cell_size)
+    return np.divmod(np.asarray(pg_id) - 1, ncols)
+
+
+def pg_id_from_lonlat(lon, lat, cell_size=CELL_SIZE):
+    """
+    Compute the pg_id of the cell containing each lon/lat point.
+
+    Points on a cell edge belong to the cell to their north-east; the eastern and northern edges of
+    the globe are folded into the last column and row.
+
+    Args:
+        lon (float or array): Longitude(s) in degrees.
+        lat (float or array): Latitude(s) in degrees.
+        cell_size (float): Cell size in degrees.
+
+    Returns:
+        int or array: The pg_id(s).
+    """
+    nrows, ncols = grid_shape(cell_size)
+    col = np.clip(np.floor((np.asarray(lon) + 180) / cell_size).astype(np.int64), 0, ncols - 1)
+    row = np.clip(np.floor((np.asarray(lat) + 90) / cell_size).astype(np.int64), 0, nrows - 1)
+    return rowcol_to_pg_id(row, col, cell_size)
+
+
+def bbox_to_rowcol(bounds, cell_size=CELL_SIZE):
+    """
+    Return the inclusive row/column range of the cells that overlap a bounding box.
+
+    Args:
+        bounds (tuple): (minx, miny, maxx, maxy) in degrees.
+        cell_size (float): Cell size in degrees.
+
+    Returns:
+        tuple: (row_min, row_max, col_min, col_max), all inclusive.
+    """
+    minx, miny, maxx, maxy = bounds
+    nrows, ncols = grid_shape(cell_size)
+    col_min = int(np.clip(np.floor((minx + 180) / cell_size), 0, ncols - 1))
+    col_max = int(np.clip(np.ceil((maxx + 180) / cell_size) - 1, 0, ncols - 1))
+    row_min = int(np.clip(np.floor((miny + 90) / cell_size), 0, nrows - 1))
+    row_max = int(np.clip(np.ceil((maxy + 90) / cell_size) - 1, 0, nrows - 1))
+    return row_min, max(row_max, row_min), col_min, max(col_max, col_min)
+
+
+def pg_ids_in_bbox(bounds, cell_size=CELL_SIZE):
+    """
+    List the pg_ids of every cell overlapping a bounding box.
+
+    Args:
+        bounds (tuple): (minx, miny, maxx, maxy) in degrees.
+        cell_size (float): Cell size in degrees.
+
+    Returns:
+        array: Sorted pg_ids.
+    """
+    row_min, row_max, col_min, col_max = bbox_to_rowcol(bounds, cell_size)
+    rows, cols = np.meshgrid(np.arange(row_min, row_max + 1), np.arange(col_min, col_max + 1), indexing='ij')
+    return rowcol_to_pg_id(rows.ravel(), cols.ravel(), cell_size)
+
+
+def pg_cell_area_sq_km(pg_ids, cell_size=CELL_SIZE):
+    """
+    Compute the true area of PG cells in square kilometres on the authalic sphere.
+
+    A cell spanning latitudes lat1..lat2 and dlon radians of longitude has area
+    R^2 * dlon * (sin(lat2) - sin(lat1)), so the area only depends on the row of the cell.
+
+    Args:
+        pg_ids (array-like): The pg_ids.
+        cell_size (float): Cell size in degrees.
+
+    Returns:
+        numpy.ndarray: The area of each cell in square kilometres.
+    """
+    rows, _ = pg_id_to_rowcol(np.asarray(pg_ids, dtype=np.int64), cell_size)
+    south = np.radians(-90 + rows * cell_size)
+    north = np.radians(-90 + (rows + 1) * cell_size)
+    return AUTHALIC_RADIUS_M ** 2 * np.radians(cell_size) * (np.sin(north) - np.sin(south)) / 1e6
+
+
+def pg_cells(pg_ids, cell_size=CELL_SIZE):
+    """
+    Build the cell geometries for the requested pg_ids only.
+
+    Args:
+        pg_ids (iterable): The pg_ids to materialize. Duplicates are dropped and the result is sorted.
+        cell_size (float): Cell size in degrees.
+
+    Returns:
+        GeoDataFrame: 'pg_id', 'lat', 'long' (cell centre) and 'geometry' (EPSG:4326), one row per cell.
+    """
+    pg_ids = np.unique(np.asarray(pg_ids, dtype=np.int64))
+    rows, cols = pg_id_to_rowcol(pg_ids, cell_size)
+    min_lon = -180 + cols * cell_size
+    min_lat = -90 + rows * cell_size
+
+    cells = pd.DataFrame({
+        'pg_id': pg_ids,
+        'lat': min_lat + cell_size / 2,
+        'long': min_lon + cell_size / 2,
+    })
+    geometry = shapely.box(min_lon, min_lat, min_lon + cell_size, min_lat + cell_size)
+    return gpd.GeoDataFrame(cells, geometry=geometry, crs="EPSG:4326")
+
+
+def pg_cells_for_geodataframe(gdf, cell_size=CELL_SIZE):
+    """
+    Build the cells overlapping the total extent of a GeoDataFrame, in the GeoDataFrame's CRS.
+
+    Args:
+        gdf (GeoDataFrame): The features whose extent defines the candidate cells.
+        cell_size (float): Cell size in degrees.
+
+    Returns:
+        GeoDataFrame: The candidate cells (see pg_cells).
+    """
+    bounds = gdf.total_bounds
+    if gdf.crs is not None and not gdf.crs.equals("EPSG:4326"):
+        bounds = gdf.to_crs("EPSG:4326").total_bounds
+
+    cells = pg_cells(pg_ids_in_bbox(bounds, cell_size), cell_size)
+    if gdf.crs is not None and not gdf.crs.equals("EPSG:4326"):
+        cells = cells.to_crs(gdf.crs)
+    return cells
@@ -0,0 +1,84 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from Utils.pg_cell_area import sum_raster_per_cell
+from Utils.pg_grid_index import CELL_SIZE
+
+
+def default_population_lookup_path(year):
+    """
+    Path of the PG population lookup of a WorldPop year.
+
+    Args:
+        year (int or str): The population year.
+
+    Returns:
+        Path: Data/Processed/Population/pg_population_<year>.npy relative to the project root.
+    """
+    project_root = Path(__file__).resolve().parent.parent
+    return project_root / 'Data' / 'Processed' / 'Population' / f'pg_population_{int(year)}.npy'
+
+
+def build_population_lookup(year, population_path, cell_size=CELL_SIZE, save_path=None):
+    """
+    Sum a global WorldPop raster onto the PG lattice and save the result as a pg_id -> population array.
+
+    Pixels are assigned to the cell containing their centre, as for the fragment populations.
+
+    Args:
+        year (int or str): The population year.
+        population_path (str): Path to the WorldPop raster of that year.
+        cell_size (float): Cell size in degrees.
+        save_path (str or None): Where to write the array. Defaults to default_population_lookup_path(year).
+
+    Returns:
+        numpy.ndarray: Population indexed by pg_id (index 0 is unused).
+    """
+    save_path = default_population_lookup_path(year) if save_path is None else Path(save_path)
+
+    print(f"Summing {population_path} onto the PG grid (one-time step for {year})...")
+    population = sum_raster_per_cell(population_path, cell_size)
+
+    # Write atomically; other workers may load the array while it is written
+    os.makedirs(save_path.parent, exist_ok=True)
+    partial_path = save_path.with_name(f"{save_path.stem}.{os.getpid()}.part.npy")
+    np.save(partial_path, population)
+    os.replace(partial_path, save_path)
+    print(f"Saved the PG population lookup to: {save_path}")
+
+    return population
+
+
+@lru_cache(maxsize=None)
+def _load_lookup(year, population_path, path):
+    if not path.exists():
+        return build_population_lookup(year, population_path, save_path=path)
+    return np.load(path)
+
+
+def load_population_lookup(year, population_path, path=None):
+    """
+    Return the pg_id -> population array of a year, building it on first use and loading it once per process.
+
+    Callers must treat the array as read-only.
+
+    Args:
+        year (int or str): The population year.
+        population_path (str): Path to the WorldPop raster of that year (used to build the lookup).
+        path (str or None): Path of the lookup. Defaults to default_population_lookup_path(year).
+
+    Returns:
+        numpy.ndarray: Population indexed by pg_id (index 0 is unused).
+    """
+    path = default_population_lookup_path(year) if path is None else Path(path)
+    return _load_lookup(int(year), str(population_path), path.resolve())
+
+
+def clear_population_lookups():
+    """
+    Drop the population lookups held in memory, e.g. after they have been rebuilt.
+    """
+    _load_lookup.cache_clear()
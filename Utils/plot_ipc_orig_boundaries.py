@@ -32,7 +32,7 @@
 import matplotlib.pyplot as plt
 import geopandas as gpd
 
-def plot_historical_ipc(merged_df_current):
+def plot_historical_ipc(merged_df_current, generate=None):
     """
     Plot IPC data for historical reporting dates, allowing user input to run the function
     and coalescing all maps into a single graphic.
@@ -40,11 +40,13 @@ def plot_historical_ipc(merged_df_current):
     Args:
         merged_df_current (GeoDataFrame): The input GeoDataFrame containing IPC data with
                                           'reporting_date' and 'value' columns.
+        generate (bool or None): Whether to generate the maps. Prompts if None.
     """
     # Prompt the user to decide whether to run the function
-    user_input = input("Do you want to generate IPC historical maps? (yes/no): ").strip().lower()
+    if generate is None:
+        generate = input("Do you want to generate IPC historical maps? (yes/no): ").strip().lower() in ['yes', 'y']
 
-    if user_input not in ['yes', 'y']:
+    if not generate:
         print("Skipping IPC historical maps generation.")
         return
 
@@ -0,0 +1,150 @@
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+
+# Manifest entry fields: 'url', 'file' (downloaded raster), 'size' (bytes), 'sha256' and 'tiled_file'
+# (the tiled copy). Files are stored relative to the population folder.
+# 'sha256' and 'size' are also the expected values of the next download of the year, so a known
+# checksum can be pinned by adding it to the entry by hand.
+MANIFEST_NAME = 'population_manifest.json'
+
+
+def default_population_folder():
+    """
+    Folder holding the WorldPop rasters and their manifest.
+
+    Returns:
+        Path: Data/External/Population relative to the project root.
+    """
+    project_root = Path(__file__).resolve().parent.parent
+    return project_root / 'Data' / 'External' / 'Population'
+
+
+def parse_reference_urls(reference_path=None):
+    """
+    Read the year -> URL associations of Population_Reference.txt.
+
+    Args:
+        reference_path (str or None): Path to the text file. Defaults to Data/External/Population_Reference.txt.
+
+    Returns:
+        dict: URLs keyed by year (int).
+    """
+    if reference_path is None:
+        project_root = Path(__file__).resolve().parent.parent
+        reference_path = project_root / 'Data' / 'External' / 'Population_Reference.txt'
+
+    urls = {}
+    with open(reference_path, 'r') as file:
+        for line in file:
+            parts = line.split(':', 1)
+            if len(parts) == 2 and parts[0].strip().isdigit():
+                urls[int(parts[0].strip())] = parts[1].strip()
+    return urls
+
+
+def build_population_manifest(save_folder=None, reference_path=None):
+    """
+    Build the manifest from the reference URLs and a single scan of the population folder.
+
+    Args:
+        save_folder (str or None): The population folder. Defaults to default_population_folder().
+        reference_path (str or None): Path to Population_Reference.txt (see parse_reference_urls).
+
+    Returns:
+        dict: Manifest entries keyed by year (int).
+    """
+    save_folder = default_population_folder() if save_folder is None else Path(save_folder)
+
+    try:
+        manifest = {year: {'url': url} for year, url in parse_reference_urls(reference_path).items()}
+    except FileNotFoundError:
+        print("Population_Reference.txt was not found; the manifest starts without URLs.")
+        manifest = {}
+
+    # Register the rasters that were downloaded before the manifest existed
+    files = os.listdir(save_folder) if os.path.exists(save_folder) else []
+    for file in sorted(files):
+        match = re.fullmatch(r'ppp_(\d{4})_1km_Aggregated\.tif', file)
+        if match:
+            entry = manifest.setdefault(int(match.group(1)), {})
+            entry['file'] = file
+            entry['size'] = os.path.getsize(save_folder / file)
+            tiled_file = file[:-len('.tif')] + '_tiled.tif'
+            if tiled_file in files:
+                entry['tiled_file'] = tiled_file
+
+    return manifest
+
+
+def _write_manifest(path, manifest):
+    # Write atomically; other processes may read the manifest at the same time
+    os.makedirs(path.parent, exist_ok=True)
+    partial_path = path.with_name(f"{path.name}.{os.getpid()}.part")
+    with open(partial_path, 'w') as file:
+        json.dump({str(year): entry for year, entry in sorted(manifest.items())}, file, indent=2)
+    os.replace(partial_path, path)
+
+
+@lru_cache(maxsize=None)
+def _load_manifest(save_folder):
+    path = save_folder / MANIFEST_NAME
+    if not path.exists():
+        manifest = build_population_manifest(save_folder)
+        _write_manifest(path, manifest)
+        return manifest
+
+    with open(path, 'r') as file:
+        return {int(year): entry for year, entry in json.load(file).items()}
+
+
+def load_population_manifest(save_folder=None):
+    """
+    Return the population manifest of a folder, reading it from disk only once per process.
+
+    The manifest (population_manifest.json in the population folder) is built on first use.
+
+    Args:
+        save_folder (str or None): The population folder. Defaults to default_population_folder().
+
+    Returns:
+        dict: Manifest entries keyed by year (int).
+    """
+    save_folder = default_population_folder() if save_folder is None else Path(save_folder)
+    return _load_manifest(save_folder.resolve())
+
+
+def update_population_manifest(year, save_folder=None, **fields):
+    """
+    Update the manifest entry of a year in memory and on disk.
+
+    Args:
+        year (int or str): The population year.
+        save_folder (str or None): The population folder. Defaults to default_population_folder().
+        **fields: Entry fields to set; fields set to None are removed.
+
+    Returns:
+        dict: The updated entry.
+    """
+    save_folder = (default_population_folder() if save_folder is None else Path(save_folder)).resolve()
+    manifest = _load_manifest(save_folder)
+
+    entry = manifest.setdefault(int(year), {})
+    for key, value in fields.items():
+        if value is None:
+            entry.pop(key, None)
+        else:
+            entry[key] = value
+
+    _write_manifest(save_folder / MANIFEST_NAME, manifest)
+    return entry
+
+
+def clear_population_manifest():
+    """
+    Drop the manifests held in memory, e.g. after the population folder was changed by hand.
+    """
+    _load_manifest.cache_clear()
@@ -6,6 +6,8 @@ def assign_combined_threshold(df, proportional_threshold=0.3, critical_value=3,
     1. If a value meets both the proportional threshold and critical value, assign it.
     2. If no value meets the thresholds, calculate the weighted sum of value by Proportional_area.
 
+    Both rules are evaluated for all pg_ids at once with grouped reductions over the whole frame.
+
     Args:
         df (DataFrame): A DataFrame containing 'pg_id', 'value', and 'Proportional_area' columns.
         proportional_threshold (float): Minimum Proportional_area to qualify.
@@ -15,23 +17,19 @@ def assign_combined_threshold(df, proportional_threshold=0.3, critical_value=3,
     Returns:
         DataFrame: A DataFrame with 'pg_id' and 'dissolved_value'.
     """
-    results = []
-
-    # Group by pg_id and apply the logic for each group
-    for pg_id, group in df.groupby(pg_id_column):
-        # Step 1: Filter rows meeting both thresholds
-        filtered = group[(group['Proportional_area'] >= proportional_threshold) & (group['value'] > critical_value)]
-
-        if not filtered.empty:
-            # Assign the maximum value from the filtered rows
-            dissolved_value = filtered['value'].max()
-        else:
-            # Fallback: Calculate the weighted sum of value by Proportional_area
-            dissolved_value = (group['value'] * group['Proportional_area']).sum()
-
-        # Append result
-        results.append({'pg_id': pg_id, 'dissolved_value': dissolved_value})
-
-    # Convert results to a DataFrame
-    result_df = pd.DataFrame(results)
-    return result_df
\ No newline at end of file
+    groups = df[pg_id_column]
+
+    # Step 1: Rows meeting both thresholds
+    qualifies = (df['Proportional_area'] >= proportional_threshold) & (df['value'] > critical_value)
+
+    # The maximum value from the qualifying rows of each pg_id
+    has_valid = qualifies.groupby(groups).any()
+    max_valid = df['value'].where(qualifies).groupby(groups).max()
+
+    # Fallback: the weighted sum of value by Proportional_area
+    weighted_sum = (df['value'] * df['Proportional_area']).groupby(groups).sum()
+
+    dissolved_value = max_valid.where(has_valid, weighted_sum)
+
+    result_df = pd.DataFrame({'pg_id': dissolved_value.index.to_numpy(), 'dissolved_value': dissolved_value.to_numpy()})
+    return result_df
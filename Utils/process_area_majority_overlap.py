@@ -4,6 +4,9 @@ def assign_majority_overlap(df, pg_id_column='pg_id'):
     """
     Assign the value that occupies the largest proportion of the area (highest Proportional_area).
 
+    The dominant row of every pg_id is found in one grouped idxmax; ties go to the first row, as
+    with DataFrame.idxmax.
+
     Args:
         df (DataFrame): A DataFrame containing 'pg_id' and 'Proportion_area' columns.
         pg_id_column (str): The column representing unique pg_ids.
@@ -11,17 +14,13 @@ def assign_majority_overlap(df, pg_id_column='pg_id'):
     Returns:
         DataFrame: A DataFrame with 'pg_id' and the dominant value.
     """
-    results = []
-
-    # Group by pg_id and find the value with the largest Proportional_area
-    for pg_id, group in df.groupby(pg_id_column):
-        # Identify the row with the maximum Proportional_area
-        dominant_row = group.loc[group['Proportional_area'].idxmax()]
-        dominant_value = dominant_row['value']
+    # Work on row positions so duplicate index labels cannot select several rows
+    positions = pd.Series(df['Proportional_area'].to_numpy(), index=pd.RangeIndex(len(df)))
+    groups = df[pg_id_column].to_numpy()
 
-        # Append the result
-        results.append({'pg_id': pg_id, 'dissolved_value': dominant_value})
+    # Identify the row with the maximum Proportional_area of each pg_id
+    dominant_rows = positions.groupby(groups).idxmax()
+    dominant_value = df['value'].to_numpy()[dominant_rows.to_numpy()]
 
-    # Convert results to a DataFrame
-    result_df = pd.DataFrame(results)
-    return result_df
\ No newline at end of file
+    result_df = pd.DataFrame({'pg_id': dominant_rows.index.to_numpy(), 'dissolved_value': dominant_value})
+    return result_df
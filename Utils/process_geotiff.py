@@ -1,8 +1,19 @@
+from collections import OrderedDict
+
 import geopandas as gpd
+import numpy as np
 import rasterio
+from rasterio.enums import Resampling
 from rasterio.mask import mask
+from rasterio.windows import Window
 from pathlib import Path
 import os
+import tempfile
+
+
+# Population windows held in memory per (country_code, year, raster), least recently used first
+_population_windows = OrderedDict()
+POPULATION_WINDOW_CACHE_SIZE = 8
 
 def clip_and_save_geotiff(tiff_path, envelope_gdf, country_code, year, save_folder=None):
     """
@@ -65,3 +76,175 @@ def clip_and_save_geotiff(tiff_path, envelope_gdf, country_code, year, save_fold
     except Exception as e:
         print(f"An error occurred: {e}")
         return None
+
+
+def read_population_window(tiff_path, bounds):
+    """
+    Read the pixels of a raster that cover a bounding box into memory.
+
+    The window is widened to whole pixels and clipped to the raster extent.
+
+    Args:
+        tiff_path (str): Path to the population GeoTIFF.
+        bounds (tuple): (minx, miny, maxx, maxy) in the CRS of the raster.
+
+    Returns:
+        dict: 'data' (2D array), 'transform', 'nodata', 'crs' and 'bounds' (the extent actually read).
+    """
+    with rasterio.open(tiff_path) as src:
+        transform = src.transform
+        minx, miny, maxx, maxy = bounds
+
+        col0 = max(int(np.floor((minx - transform.c) / transform.a)), 0)
+        row0 = max(int(np.floor((maxy - transform.f) / transform.e)), 0)
+        col1 = min(int(np.ceil((maxx - transform.c) / transform.a)), src.width)
+        row1 = min(int(np.ceil((miny - transform.f) / transform.e)), src.height)
+        window = Window(col0, row0, max(col1 - col0, 0), max(row1 - row0, 0))
+
+        window_transform = src.window_transform(window)
+        return {
+            'data': src.read(1, window=window),
+            'transform': window_transform,
+            'nodata': src.nodata,
+            'crs': src.crs,
+            'bounds': rasterio.windows.bounds(window, transform),
+        }
+
+
+def get_population_window(tiff_path, envelope_gdf, country_code, year):
+    """
+    Return the population pixels covering an envelope, read into memory once per (country, year).
+
+    Reporting dates of the same year reuse the cached array. When an envelope reaches beyond the
+    cached window, the window is re-read to cover both.
+
+    Args:
+        tiff_path (str): Path to the population GeoTIFF.
+        envelope_gdf (GeoDataFrame): A GeoDataFrame containing the buffered envelope geometry.
+        country_code (str): The country code the window belongs to.
+        year (int or str): The population year.
+
+    Returns:
+        dict: The population window (see read_population_window).
+    """
+    with rasterio.open(tiff_path) as src:
+        raster_crs = src.crs
+        raster_bounds = src.bounds
+
+    # Envelope extent in the raster CRS, limited to the raster itself
+    if envelope_gdf.crs != raster_crs:
+        envelope_gdf = envelope_gdf.to_crs(raster_crs)
+    minx, miny, maxx, maxy = envelope_gdf.total_bounds
+    bounds = (
+        max(minx, raster_bounds.left), max(miny, raster_bounds.bottom),
+        min(maxx, raster_bounds.right), min(maxy, raster_bounds.top),
+    )
+
+    key = (country_code, int(year), str(tiff_path))
+    cached = _population_windows.get(key)
+    if cached is not None:
+        left, bottom, right, top = cached['bounds']
+        if left <= bounds[0] and bottom <= bounds[1] and right >= bounds[2] and top >= bounds[3]:
+            _population_windows.move_to_end(key)
+            return cached
+
+        # Extend the cached window to cover the new envelope as well
+        print(f"Extending the population window for {country_code} ({year}).")
+        bounds = (min(left, bounds[0]), min(bottom, bounds[1]), max(right, bounds[2]), max(top, bounds[3]))
+
+    window = read_population_window(tiff_path, bounds)
+    print(f"Read a {window['data'].shape[0]} x {window['data'].shape[1]} population window for {country_code} ({year}).")
+
+    _population_windows[key] = window
+    _population_windows.move_to_end(key)
+    while len(_population_windows) > POPULATION_WINDOW_CACHE_SIZE:
+        _population_windows.popitem(last=False)
+
+    return window
+
+
+def clear_population_windows():
+    """
+    Drop all population windows held in memory.
+    """
+    _population_windows.clear()
+
+
+def tiled_population_path(source_path):
+    """
+    Path of the tiled copy of a downloaded population raster, kept next to the original.
+
+    Args:
+        source_path (str): Path to the downloaded raster (e.g. ppp_2020_1km_Aggregated.tif).
+
+    Returns:
+        str: The path of the tiled copy (e.g. ppp_2020_1km_Aggregated_tiled.tif).
+    """
+    root, extension = os.path.splitext(str(source_path))
+    return f"{root}_tiled{extension}"
+
+
+def ingest_population_raster(source_path, block_size=512, overview_levels=(2, 4, 8, 16, 32)):
+    """
+    Convert a downloaded population raster into an internally tiled, DEFLATE-compressed GeoTIFF with overviews.
+
+    Windowed reads of the tiled copy only decode the tiles they touch, whatever layout the source
+    was shipped in. The source is copied in bands of block_size rows and the copy is written under
+    a unique temporary name, then renamed, so an interrupted or concurrent ingest never leaves a
+    partial raster behind. A tiled copy that already exists is not rewritten.
+
+    Args:
+        source_path (str): Path to the downloaded raster.
+        block_size (int): Tile width and height in pixels (a multiple of 16).
+        overview_levels (tuple): Decimation factors of the (average) overviews.
+
+    Returns:
+        str: Path to the tiled raster, or None if the conversion failed.
+    """
+    tiled_path = tiled_population_path(source_path)
+    if os.path.exists(tiled_path):
+        return tiled_path
+
+    partial_path = None
+    try:
+        # Unique partial file next to the target, so the rename stays on one file system
+        handle, partial_path = tempfile.mkstemp(
+            prefix=f"{os.path.basename(tiled_path)}.", suffix='.part', dir=os.path.dirname(os.path.abspath(tiled_path)),
+        )
+        os.close(handle)
+        print(f"Converting {source_path} to a tiled, compressed raster...")
+
+        with rasterio.open(source_path) as src:
+            profile = src.profile.copy()
+            profile.update({
+                'driver': 'GTiff',
+                'tiled': True,
+                'blockxsize': block_size,
+                'blockysize': block_size,
+                'compress': 'deflate',
+                'predictor': 3 if np.issubdtype(np.dtype(src.dtypes[0]), np.floating) else 2,
+                'BIGTIFF': 'IF_SAFER',
+            })
+
+            with rasterio.open(partial_path, 'w', **profile) as dst:
+                # Copy whole-width bands of one tile row at a time
+                for row0 in range(0, src.height, block_size):
+                    window = Window(0, row0, src.width, min(block_size, src.height - row0))
+                    dst.write(src.read(window=window), window=window)
+
+        with rasterio.open(partial_path, 'r+') as dst:
+            dst.build_overviews(list(overview_levels), Resampling.average)
+            dst.update_tags(ns='rio_overview', resampling='average')
+
+        # mkstemp creates the file private to the user; give it the permissions of the source
+        os.chmod(partial_path, os.stat(source_path).st_mode & 0o777)
+        os.replace(partial_path, tiled_path)
+        print(f"Tiled population raster saved to: {tiled_path}")
+        return tiled_path
+
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        if partial_path is not None and os.path.exists(partial_path):
+            os.remove(partial_path)
+        return None
+
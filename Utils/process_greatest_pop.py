@@ -26,28 +26,14 @@ def aggregate_by_greatest_population(df):
     # Fill NaN values with 0
     df.fillna({'Proportion_population': 0, 'Proportional_area': 0, 'feature_population': 0, 'Cell_population': 0}, inplace=True)
 
-    # Create a dictionary to determine whether to use population or area for each pg_id
-    pg_decision = {}
+    # Decide per pg_id whether to use population or area, broadcast back to every row
     grouped = df.groupby('pg_id')
-    
-    for pg_id, group in grouped:
-        max_population_proportion = group['Proportion_population'].max()
-        total_cell_population = group['Cell_population'].max()
-        
-        if max_population_proportion > 0 or total_cell_population > 0:
-            pg_decision[pg_id] = 'population'
-        else:
-            pg_decision[pg_id] = 'area'
+    max_population_proportion = grouped['Proportion_population'].transform('max')
+    total_cell_population = grouped['Cell_population'].transform('max')
+    use_population = (max_population_proportion > 0) | (total_cell_population > 0)
 
-    # Apply the weighted value calculation based on the decision for each pg_id
-    def calculate_weighted_value(row):
-        if pg_decision[row['pg_id']] == 'population':
-            return row['Proportion_population'] * row['value']
-        else:
-            return row['Proportional_area'] * row['value']
-    
-    # Add the weighted value column
-    df['weighted_value'] = df.apply(calculate_weighted_value, axis=1)
+    # Add the weighted value column: population weighting where decided, area weighting otherwise
+    df['weighted_value'] = (df['Proportion_population'] * df['value']).where(use_population, df['Proportional_area'] * df['value'])
 
     # Aggregate the new weighted values at the pg_id level
     aggregated_df = df.groupby('pg_id').agg({
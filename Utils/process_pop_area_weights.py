@@ -1,15 +1,25 @@
+import numpy as np
 import pandas as pd
 
-def get_population_thresholds(default_thresholds=[50, 85]):
+def get_population_thresholds(default_thresholds=[50, 85], thresholds=None):
     """
     Prompt the user to define specific population thresholds or use the default thresholds.
 
     Args:
         default_thresholds (list): The default list of percentiles to calculate.
+        thresholds (list or None): Preset thresholds (e.g. from a run configuration). Prompts if None.
 
     Returns:
         list: A list of user-defined or default thresholds.
     """
+    # Preset thresholds are validated instead of prompting
+    if thresholds is not None:
+        thresholds = [int(t) for t in thresholds]
+        if not all(0 <= t <= 100 for t in thresholds):
+            raise ValueError("Thresholds must be between 0 and 100.")
+        print(f"Using thresholds: {thresholds}")
+        return thresholds
+
     print("\nWould you like to define specific population thresholds?")
     print(f"If not, the default thresholds ({', '.join(map(str, default_thresholds))} percentiles) will be used.")
 
@@ -56,16 +66,24 @@ def calculate_population_percentiles(df, column='Cell_population', percentiles=[
 
     return percentile_values
 
-def get_user_defined_weights(percentiles):
+def get_user_defined_weights(percentiles, weights=None):
     """
     Prompt the user to define weights for population and area for each percentile.
 
     Args:
         percentiles (list): List of percentiles (e.g., ['85th', '50th']).
+        weights (dict or None): Preset weights keyed by percentile (e.g. from a run configuration). Prompts if None.
 
     Returns:
         dict: A dictionary with keys as percentiles and values as (population_weight, area_weight) tuples.
     """
+    # Preset weights are validated instead of prompting
+    if weights is not None:
+        missing = [percentile for percentile in percentiles if percentile not in weights]
+        if missing:
+            raise ValueError(f"Missing weights for percentiles: {', '.join(missing)}.")
+        return {percentile: tuple(float(w) for w in weights[percentile]) for percentile in percentiles}
+
     weights = {}
     for percentile in percentiles:
         print(f"\nFor the {percentile} percentile:")
@@ -92,6 +110,37 @@ def get_user_defined_weights(percentiles):
     return weights
 
 
+def assign_percentile_weights(cell_population, population_percentiles, user_defined_weights):
+    """
+    Look up the (population, area) weights of every row from its population percentile bucket.
+
+    A row takes the weights of the highest percentile whose value its Cell_population reaches, and
+    (0.0, 1.0) below the lowest percentile or without a population. Any number of percentiles is
+    supported; the bucket of every row is found in one np.searchsorted call.
+
+    Args:
+        cell_population (array-like): The Cell_population of every row.
+        population_percentiles (dict): Percentile keys (e.g. '85th') and their population values.
+        user_defined_weights (dict): (population_weight, area_weight) for each percentile key.
+
+    Returns:
+        tuple: Arrays of population weights and area weights, one entry per row.
+    """
+    # Percentiles in ascending order; their values are then ascending as well
+    keys = sorted(population_percentiles, key=lambda x: int(x.rstrip('th')))
+    bounds = np.array([population_percentiles[key] for key in keys], dtype=float)
+
+    # Bucket 0 is below every percentile, bucket i reaches the i-th lowest percentile
+    population_weights = np.array([0.0] + [user_defined_weights[key][0] for key in keys], dtype=float)
+    area_weights = np.array([1.0] + [user_defined_weights[key][1] for key in keys], dtype=float)
+
+    cell_population = np.asarray(cell_population, dtype=float)
+    buckets = np.searchsorted(bounds, cell_population, side='right')
+    buckets[np.isnan(cell_population)] = 0
+
+    return population_weights[buckets], area_weights[buckets]
+
+
 def aggregate_with_weighted_proportions(df, population_percentiles, user_defined_weights):
     """
     Aggregate values with weighted proportions using user-defined weights for each percentile.
@@ -104,25 +153,14 @@ def aggregate_with_weighted_proportions(df, population_percentiles, user_defined
     Returns:
         pd.DataFrame: Aggregated DataFrame with weighted values.
     """
-    def calculate_weighted_value(row):
-        # Identify upper and lower percentiles dynamically
-        upper_key, lower_key = sorted(population_percentiles.keys(), key=lambda x: int(x.rstrip('th')), reverse=True)
-
-        # Apply user-defined weights
-        if row['Cell_population'] >= population_percentiles[upper_key]:
-            weight_population, weight_area = user_defined_weights[upper_key]
-        elif row['Cell_population'] >= population_percentiles[lower_key]:
-            weight_population, weight_area = user_defined_weights[lower_key]
-        else:
-            weight_population, weight_area = (0.0, 1.0)
-
-        return (
-            weight_population * row['Proportion_population'] * row['value'] +
-            weight_area * row['Proportional_area'] * row['value']
-        )
-
-    # Apply the weighted value calculation row-by-row
-    df['weighted_value'] = df.apply(calculate_weighted_value, axis=1)
+    # Apply user-defined weights by population percentile bucket
+    weight_population, weight_area = assign_percentile_weights(df['Cell_population'], population_percentiles, user_defined_weights)
+
+    # Calculate the weighted value of every row at once
+    df['weighted_value'] = (
+        weight_population * df['Proportion_population'] * df['value'] +
+        weight_area * df['Proportional_area'] * df['value']
+    )
 
     # Aggregate by `pg_id`
     aggregated_df = df.groupby('pg_id').agg({
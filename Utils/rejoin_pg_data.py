@@ -1,23 +1,12 @@
-import os 
-from pathlib import Path
-import geopandas as gpd
+from Utils.pg_grid_index import pg_cells
 
 def rejoin_to_pg(result_df):
-    
-    project_root = Path(__file__).resolve().parent.parent
 
-    #--------------------------------------
-    # Location to save geodataframe (as shapefile)
-    #--------------------------------------
+    # Generate the PG cells present in the result only
+    gdf = pg_cells(result_df['pg_id'])
 
-    ref_shapefile_path = project_root / 'Data' / 'Processed' / 'extent_shapefile' 
-    os.makedirs(ref_shapefile_path, exist_ok=True)
 
-
-    gdf = gpd.read_file(f"{ref_shapefile_path}/pg_viewser_extent.shp")
-
-
-    # Merge the shapefile GeoDataFrame with the `result` DataFrame on the `pg_id` column
+    # Merge the PG cells with the `result` DataFrame on the `pg_id` column
     merged_gdf = gdf.merge(result_df, on='pg_id', how='inner')
     return(merged_gdf)
 
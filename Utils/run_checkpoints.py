@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+
+def run_identifier(run_parameters):
+    """
+    Derive a stable identifier for a run from the parameters that determine its results.
+
+    Args:
+        run_parameters (dict): JSON-serializable run parameters (classification, dates, process, ...).
+
+    Returns:
+        str: A short hexadecimal identifier.
+    """
+    encoded = json.dumps(run_parameters, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()[:12]
+
+
+def default_checkpoint_folder(run_id):
+    """
+    Folder holding the checkpoints and the run manifest of a run.
+
+    Args:
+        run_id (str): The run identifier (see run_identifier).
+
+    Returns:
+        Path: Data/Processed/checkpoints/<run_id> relative to the project root.
+    """
+    project_root = Path(__file__).resolve().parent.parent
+    return project_root / 'Data' / 'Processed' / 'checkpoints' / run_id
+
+
+def unit_key(country_code, processing_date):
+    """
+    Key of a (country, date) work unit in the run manifest.
+    """
+    return f"{country_code}_{processing_date}"
+
+
+def unit_input_hash(unit_gdf):
+    """
+    Fingerprint the input of a work unit, so a checkpoint is not reused after the IPC values or
+    the boundaries of the unit changed.
+
+    Args:
+        unit_gdf (GeoDataFrame): The IPC values merged with boundaries for the unit.
+
+    Returns:
+        str: A hexadecimal digest.
+    """
+    digest = hashlib.sha1()
+    columns = [column for column in ['fnid', 'value'] if column in unit_gdf.columns]
+    digest.update(pd.util.hash_pandas_object(unit_gdf[columns].astype(str), index=False).to_numpy().tobytes())
+    for wkb in shapely.to_wkb(unit_gdf.geometry.to_numpy()):
+        # Units without a matching boundary have no geometry
+        digest.update(b'' if wkb is None else wkb)
+    return digest.hexdigest()
+
+
+def load_run_manifest(folder, run_parameters):
+    """
+    Load the run manifest of a checkpoint folder, or start a new one.
+
+    Args:
+        folder (Path): The checkpoint folder.
+        run_parameters (dict): The parameters of the run, stored in a new manifest.
+
+    Returns:
+        dict: The manifest with 'parameters' and 'units' (unit key -> status entry).
+    """
+    manifest_path = Path(folder) / 'manifest.json'
+    if manifest_path.exists():
+        with open(manifest_path, 'r') as file:
+            return json.load(file)
+    return {'parameters': json.loads(json.dumps(run_parameters, default=str)), 'units': {}}
+
+
+def save_run_manifest(folder, manifest):
+    """
+    Write the run manifest atomically.
+    """
+    os.makedirs(folder, exist_ok=True)
+    manifest_path = Path(folder) / 'manifest.json'
+    partial_path = manifest_path.with_name('manifest.json.part')
+    with open(partial_path, 'w') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(partial_path, manifest_path)
+
+
+def completed_unit(folder, manifest, key, input_hash):
+    """
+    Check whether a unit has a usable checkpoint.
+
+    Args:
+        folder (Path): The checkpoint folder.
+        manifest (dict): The run manifest.
+        key (str): The unit key.
+        input_hash (str): The fingerprint of the unit's current input.
+
+    Returns:
+        bool: True if the unit completed with the same input and its result file exists.
+    """
+    entry = manifest['units'].get(key)
+    return (
+        entry is not None
+        and entry.get('status') == 'done'
+        and entry.get('input_hash') == input_hash
+        and (Path(folder) / entry['file']).exists()
+    )
+
+
+def save_unit_result(folder, manifest, key, input_hash, result):
+    """
+    Persist the result of a completed unit and mark it done in the manifest.
+
+    Args:
+        folder (Path): The checkpoint folder.
+        manifest (dict): The run manifest (updated and saved).
+        key (str): The unit key.
+        input_hash (str): The fingerprint of the unit's input.
+        result (DataFrame or GeoDataFrame): The unit result.
+    """
+    os.makedirs(folder, exist_ok=True)
+    file = f"{key}.parquet"
+    partial_path = Path(folder) / f"{file}.part"
+    result.to_parquet(partial_path)
+    os.replace(partial_path, Path(folder) / file)
+
+    manifest['units'][key] = {
+        'status': 'done',
+        'file': file,
+        'geo': isinstance(result, gpd.GeoDataFrame),
+        'rows': len(result),
+        'input_hash': input_hash,
+        'completed': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    save_run_manifest(folder, manifest)
+
+
+def record_unit_failure(folder, manifest, key, input_hash, error):
+    """
+    Mark a unit as failed in the manifest, so the next run retries it.
+
+    Args:
+        folder (Path): The checkpoint folder.
+        manifest (dict): The run manifest (updated and saved).
+        key (str): The unit key.
+        input_hash (str): The fingerprint of the unit's input.
+        error (str): A description of the failure.
+    """
+    manifest['units'][key] = {
+        'status': 'failed',
+        'input_hash': input_hash,
+        'error': error,
+        'failed': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    save_run_manifest(folder, manifest)
+
+
+def load_unit_result(folder, manifest, key):
+    """
+    Load the checkpointed result of a completed unit.
+
+    Args:
+        folder (Path): The checkpoint folder.
+        manifest (dict): The run manifest.
+        key (str): The unit key.
+
+    Returns:
+        DataFrame or GeoDataFrame: The unit result.
+    """
+    entry = manifest['units'][key]
+    path = Path(folder) / entry['file']
+    return gpd.read_parquet(path) if entry.get('geo') else pd.read_parquet(path)
@@ -0,0 +1,148 @@
+import argparse
+import json
+
+
+# Parameters of a non-interactive run. Every entry replaces one of the interactive prompts.
+DEFAULT_RUN_CONFIG = {
+    'ipc_classification': None,     # 'IPC20', 'IPC30' or 'IPC31' (or 'IPC 2.0', ...)  (required)
+    'start_date': None,             # YYYY-MM-DD  (required)
+    'end_date': None,               # YYYY-MM-DD  (required)
+    'coverage_plot': False,         # Generate the IPC completeness graphic
+    'countries': 'All',             # 'All' or a list of country codes
+    'scenario': 'Current Situation',
+    'historical_maps': False,       # Generate the IPC historical maps
+    'dates': 'All',                 # 'All' or a list of reporting dates (YYYY-MM-DD)
+    'process': 6,                   # Process number 1-6, or 'all' for every process side by side
+    'process_params': {},           # threshold / proportional_threshold / critical_value / thresholds / weights
+    'workers': 1,                   # Worker processes for the country x date units
+    'output': None,                 # Output path prefix; defaults to Data/Processed/results/FEWSnet_to_PG_
+    'csv': False,                   # Also export the results as one CSV file next to the Parquet dataset
+    'exact_coverage': False,        # Weight boundary pixels by their exact covered fraction (population processes)
+}
+
+REQUIRED_KEYS = ['ipc_classification', 'start_date', 'end_date']
+
+
+def load_run_config(config_path=None, overrides=None):
+    """
+    Load a run configuration from a JSON file and apply overrides on top of the defaults.
+
+    Args:
+        config_path (str or None): Path to a JSON file with keys from DEFAULT_RUN_CONFIG.
+        overrides (dict or None): Values that take precedence over the file (e.g. from CLI flags).
+                                  Entries set to None are ignored.
+
+    Returns:
+        dict: The complete run configuration.
+    """
+    config = dict(DEFAULT_RUN_CONFIG)
+    config['process_params'] = {}
+
+    if config_path is not None:
+        with open(config_path, 'r') as file:
+            loaded = json.load(file)
+        unknown = sorted(set(loaded) - set(DEFAULT_RUN_CONFIG))
+        if unknown:
+            raise ValueError(f"Unknown run configuration keys: {', '.join(unknown)}")
+        config.update(loaded)
+
+    for key, value in (overrides or {}).items():
+        if value is None:
+            continue
+        if key == 'process_params':
+            config['process_params'] = {**config['process_params'], **value}
+        else:
+            config[key] = value
+
+    missing = [key for key in REQUIRED_KEYS if not config.get(key)]
+    if missing:
+        raise ValueError(f"The run configuration is missing: {', '.join(missing)}")
+
+    config['process'] = _process_argument(str(config['process']))
+    if config['process'] in (6, 'all') and 'weights' not in config['process_params']:
+        raise ValueError("Process 6 needs population weights, e.g. \"weights\": {\"85th\": [1.0, 0.0], \"50th\": [0.75, 0.25]}")
+
+    return config
+
+
+def _process_argument(value):
+    # A process number 1-6 or 'all'
+    if value.strip().lower() == 'all':
+        return 'all'
+    process = int(value)
+    if process not in range(1, 7):
+        raise ValueError(f"Invalid process {value}. Use 1-6 or 'all'.")
+    return process
+
+
+def _list_argument(value):
+    # 'All' stays a string, anything else becomes a list of comma-separated entries
+    if value.strip().lower() == 'all':
+        return 'All'
+    return [entry.strip() for entry in value.split(',') if entry.strip()]
+
+
+def build_argument_parser():
+    """
+    Build the command line parser for main.py.
+
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    parser = argparse.ArgumentParser(
+        description="Translate FEWS NET IPC data to PRIO-GRID resolution. Without --config or run flags, "
+                    "all parameters are asked for interactively."
+    )
+    parser.add_argument('--config', help="JSON run configuration file (keys as in Utils/run_config.py).")
+    parser.add_argument('--ipc-classification', dest='ipc_classification', help="IPC20, IPC30 or IPC31.")
+    parser.add_argument('--start-date', dest='start_date', help="Start date (YYYY-MM-DD).")
+    parser.add_argument('--end-date', dest='end_date', help="End date (YYYY-MM-DD).")
+    parser.add_argument('--countries', type=_list_argument, help="'All' or comma-separated country codes.")
+    parser.add_argument('--dates', type=_list_argument, help="'All' or comma-separated reporting dates.")
+    parser.add_argument('--scenario', help="Scenario name (default: Current Situation).")
+    parser.add_argument('--process', type=_process_argument, help="Process number 1-6, or 'all' to compute every process side by side.")
+    parser.add_argument('--threshold', type=float, help="Proportional_area threshold for process 2.")
+    parser.add_argument('--proportional-threshold', dest='proportional_threshold', type=float, help="Proportional threshold for process 3.")
+    parser.add_argument('--critical-value', dest='critical_value', type=float, help="Critical value for process 3.")
+    parser.add_argument('--population-thresholds', dest='thresholds', type=lambda v: [int(t) for t in v.split(',')],
+                        help="Population percentiles for process 6, e.g. 50,85.")
+    parser.add_argument('--population-weights', dest='weights', type=json.loads,
+                        help='Population/area weights per percentile for process 6 as JSON, e.g. \'{"85th": [1, 0], "50th": [0.75, 0.25]}\'.')
+    parser.add_argument('--coverage-plot', dest='coverage_plot', action='store_true', default=None, help="Generate the IPC completeness graphic.")
+    parser.add_argument('--historical-maps', dest='historical_maps', action='store_true', default=None, help="Generate the IPC historical maps.")
+    parser.add_argument('--workers', type=int, help="Worker processes for the country x date units (default: 1).")
+    parser.add_argument('--fresh', action='store_true', help="Ignore the checkpoints of earlier runs and process every unit again.")
+    parser.add_argument('--output', help="Output path prefix (default: Data/Processed/results/FEWSnet_to_PG_).")
+    parser.add_argument('--csv', action='store_true', default=None, help="Also export the results as one CSV file.")
+    parser.add_argument('--exact-coverage', dest='exact_coverage', action='store_true', default=None,
+                        help="Weight population pixels crossed by a unit boundary by their exact covered fraction (processes 5, 6 and 'all').")
+    return parser
+
+
+def config_from_arguments(args):
+    """
+    Turn parsed command line arguments into a run configuration.
+
+    Args:
+        args (argparse.Namespace): Arguments from build_argument_parser().
+
+    Returns:
+        dict or None: The run configuration, or None when neither --config nor any run flag was given
+                      (interactive mode). --workers, --output, --csv and --exact-coverage alone keep the interactive mode;
+                      main.py applies them to the interactive run.
+    """
+    process_param_keys = ['threshold', 'proportional_threshold', 'critical_value', 'thresholds', 'weights']
+    overrides = {
+        key: getattr(args, key)
+        for key in DEFAULT_RUN_CONFIG
+        if key not in ('process_params',) and hasattr(args, key)
+    }
+    overrides['process_params'] = {key: getattr(args, key) for key in process_param_keys if getattr(args, key) is not None}
+
+    # Options that do not answer a prompt keep the interactive mode
+    given = any(value is not None for key, value in overrides.items() if key not in ('process_params', 'workers', 'output', 'csv', 'exact_coverage'))
+    given = given or bool(overrides['process_params'])
+    if args.config is None and not given:
+        return None
+
+    return load_run_config(args.config, overrides)
@@ -1,64 +1,17 @@
-# Define the function to create a 0.5x0.5 degree grid cell around a center point
+from Utils.give_PG_reference import provide_reference_frame
 
-import pandas as pd
-from pathlib import Path
 
-import geopandas as gpd
-import pandas as pd
-from shapely.geometry import Polygon
-import os 
+def generate_reference_frame(cell_size=0.5, write_shapefile=False):
+    """
+    Generate and save the PG reference grid.
 
-def create_grid_cell(lat, lon, cell_size=0.5):
-    half_size = cell_size / 2
-    # Define the corners of the grid cell
-    return Polygon([
-        (lon - half_size, lat - half_size),  # Bottom-left
-        (lon + half_size, lat - half_size),  # Bottom-right
-        (lon + half_size, lat + half_size),  # Top-right
-        (lon - half_size, lat + half_size),  # Top-left
-        (lon - half_size, lat - half_size)   # Close the polygon
-    ])
+    Kept for backwards compatibility; the grid is built by provide_reference_frame.
 
-from ingester3.extensions import *
+    Args:
+        cell_size (float): Cell size in degrees. Defaults to the 0.5 degree PRIO-GRID resolution.
+        write_shapefile (bool): Also write pg_viewser_extent.shp next to the GeoParquet file.
 
-def generate_reference_frame():
-
-    project_root = Path(__file__).resolve().parent.parent
-
-    #--------------------------------------
-    # Location to save geodataframe (as shapefile)
-    #--------------------------------------
-
-    ref_table_path = project_root / 'data' / 'processed' / 'reference_table'
-
-    ref_shapefile_path = project_root / 'Data' / 'Processed' / 'extent_shapefile' 
-    os.makedirs(ref_shapefile_path, exist_ok=True)
-
-
-    #temporal_aggregation_value = param_request['temporal_aggregation'][0]
-
-
-# ----------------------------------------------------------------------------------------------------
-    # ------------------------
-    # Construct PG scaffolder
-    # ------------------------
-
-    #add a print() line when building the scaffolders as this may take several minutes
-    print()
-    print('Generating empty PG scaffolders which will be used to validate the spatial and temporal completeness of the selected indice.')
-    print('This is expected to take several minutes...')
-    print()
-    
-    pg = pd.DataFrame.pg.new_structure()
-
-    pg['lat'] = pg.pg.lat
-    pg['long'] = pg.pg.lon
-
-    geometry = pg.apply(lambda row: create_grid_cell(row['lat'], row['long']), axis=1)
-    gdf = gpd.GeoDataFrame(pg, geometry=geometry, crs="EPSG:4326")
-    # ------------------------
-    # WHY DO DO FOLLOW THIS ORDER:
-    # apply lat and long first 
-    gdf.to_file(f"{ref_shapefile_path}/pg_viewser_extent.shp")  # Save as a shapefile if needed
-    # ------------------------
-# ----------------------------------------------------------------------------------------------------
\ No newline at end of file
+    Returns:
+        GeoDataFrame: The generated PG reference grid.
+    """
+    return provide_reference_frame(cell_size=cell_size, write_shapefile=write_shapefile)
@@ -1,4 +1,4 @@
-def define_scenario(merged_df, scenario='Current Situation'):
+def define_scenario(merged_df, scenario='Current Situation', interactive=True):
     """
     Filter the DataFrame for the specified scenario. If the scenario doesn't exist,
     offer the user the option to select from available scenarios or quit.
@@ -6,6 +6,8 @@ def define_scenario(merged_df, scenario='Current Situation'):
     Args:
         merged_df (DataFrame): The DataFrame containing a 'scenario_name' column.
         scenario (str): The desired scenario to filter for. Defaults to 'Current Situation'.
+        interactive (bool): Offer a choice of available scenarios when the scenario does not exist.
+                            If False, None is returned instead.
 
     Returns:
         DataFrame: A filtered DataFrame for the specified scenario.
@@ -19,6 +21,9 @@ def define_scenario(merged_df, scenario='Current Situation'):
         print("Available scenarios:")
         for idx, available_scenario in enumerate(available_scenarios, start=1):
             print(f"{idx}: {available_scenario}")
+
+        if not interactive:
+            return None
         
         # Offer the user the option to select or quit
         user_choice = input("Enter the number of your chosen scenario, or 'q' to quit: ").strip()
@@ -1,12 +1,14 @@
 import sys
 
-def get_dates_to_process(dataset_dates):
+def get_dates_to_process(dataset_dates, selection=None):
     """
     Allow the user to select either all dates or a single date from the list.
     Repeats the prompt until a valid date is provided or the user chooses to quit.
 
     Args:
         dataset_dates (list): Sorted list of available dates.
+        selection (str, list or None): A preset selection: 'All' or a list of dates. Dates that are not
+                                       available are skipped. Prompts if None.
 
     Returns:
         list: A list of dates to process (either all dates or a single selected date).
@@ -15,6 +17,16 @@ def get_dates_to_process(dataset_dates):
     for idx, date in enumerate(dataset_dates):
         print(f"{idx + 1}. {date}")
 
+    # A preset selection is applied instead of prompting
+    if selection is not None:
+        if isinstance(selection, str) and selection.lower() == "all":
+            return dataset_dates
+        selected = [selection] if isinstance(selection, str) else list(selection)
+        missing = [date for date in selected if date not in dataset_dates]
+        if missing:
+            print(f"Skipping dates not available for this country: {', '.join(missing)}")
+        return [date for date in dataset_dates if date in selected]
+
     while True:
         print("\nEnter one of the following options:")
         print("1. Type a specific date from the above list.")
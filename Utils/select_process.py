@@ -6,32 +6,55 @@ from Utils.process_area_threshold import assign_max_above_threshold_with_fallbac
 from Utils.process_greatest_pop import aggregate_by_greatest_population
 from Utils.process_pop_area_weights import calculate_population_percentiles, aggregate_with_weighted_proportions, get_population_thresholds, get_user_defined_weights 
 
+import pandas as pd
 
-def define_process(process_selection, intersected_gdf):
+
+# Process numbers computed by the 'all' (multi-method) selection
+ALL_PROCESSES = [1, 2, 3, 4, 5, 6]
+
+
+def get_process_parameters(process_selection, preset=None):
     """
-    Execute a selected process based on user input and optional parameters.
+    Prompt the user once for the parameters of the selected process.
+
+    Collecting the parameters up front means they do not have to be asked again for every
+    country and date, and the processing itself can run without user input (e.g. in parallel).
 
     Args:
-        process_selection (int): The selected process number (1, 2, 3, or 4).
+        process_selection (int or str): The selected process number (1-6), or 'all'.
+        preset (dict or None): Preset parameters (e.g. from a run configuration). When given, the
+                               user is not prompted and missing parameters take their defaults.
 
     Returns:
-        DataFrame: The result of the selected process.
+        dict: The parameters for define_process (empty for processes without parameters). For
+              'all', a dictionary of the parameters of every process keyed by process number.
     """
-
-    if process_selection == 1:
-        result = calculate_weighted_values(intersected_gdf)
-        return result
-
-    elif process_selection == 2:
+    if process_selection == 'all':
+        return {process: get_process_parameters(process, preset) for process in ALL_PROCESSES}
+
+    if preset is not None:
+        if process_selection == 2:
+            return {'threshold': float(preset.get('threshold', 0.2))}
+        elif process_selection == 3:
+            return {
+                'proportional_threshold': float(preset.get('proportional_threshold', 0.3)),
+                'critical_value': float(preset.get('critical_value', 3)),
+            }
+        elif process_selection == 6:
+            thresholds = get_population_thresholds(default_thresholds=[50, 85], thresholds=preset.get('thresholds', [50, 85]))
+            sorted_percentiles = [f"{threshold}th" for threshold in sorted(thresholds, reverse=True)]
+            weights = get_user_defined_weights(sorted_percentiles, weights=preset.get('weights', {}))
+            return {'thresholds': thresholds, 'weights': weights}
+        return {}
+
+    if process_selection == 2:
         # Prompt user input for threshold with a default value
         try:
             threshold = float(input("Enter the threshold for Proportional_area (default is 0.2): ") or 0.2)
         except ValueError:
             print("Invalid input. Using default threshold of 0.2.")
             threshold = 0.2
-
-        result = assign_max_above_threshold_with_fallback(intersected_gdf, threshold=threshold)
-        return result
+        return {'threshold': threshold}
 
     elif process_selection == 3:
         # Prompt user input for both proportional threshold and critical value
@@ -47,7 +70,88 @@ def define_process(process_selection, intersected_gdf):
             print("Invalid input. Using default critical value of 3.")
             critical_value = 3
 
-        result = assign_combined_threshold(intersected_gdf, proportional_threshold=proportional_threshold, critical_value=critical_value)
+        return {'proportional_threshold': proportional_threshold, 'critical_value': critical_value}
+
+    elif process_selection == 6:
+        # Step 1: Get population thresholds (user can modify or use defaults)
+        thresholds = get_population_thresholds(default_thresholds=[50, 85])
+
+        # Step 2: Get user-defined weights for each percentile key, highest first
+        sorted_percentiles = [f"{threshold}th" for threshold in sorted(thresholds, reverse=True)]
+        print("\nDefine the weights for each population percentile.")
+        user_defined_weights = get_user_defined_weights(sorted_percentiles)
+
+        return {'thresholds': thresholds, 'weights': user_defined_weights}
+
+    return {}
+
+
+def define_all_processes(intersected_gdf, process_params):
+    """
+    Execute every dissolve process (1-6) on one intersected frame and collect the results side by side.
+
+    Each process receives its own copy of the (geometry-free) fragment table, so processes that
+    add or fill columns cannot influence each other and every column equals a single-process run.
+
+    Args:
+        intersected_gdf (GeoDataFrame): The intersected PG/FEWS NET fragments, including the
+                                        population attributes needed by processes 5 and 6.
+        process_params (dict): Parameters of every process keyed by process number, as returned by
+                               get_process_parameters('all').
+
+    Returns:
+        DataFrame: One row per 'pg_id' with a 'process_<n>' column per process.
+    """
+    fragments = pd.DataFrame(intersected_gdf.drop(columns=intersected_gdf.geometry.name))
+
+    combined = None
+    for process in ALL_PROCESSES:
+        result = define_process(process, fragments.copy(), process_params[process])
+
+        # Processes 1-4 return 'dissolved_value', 5 and 6 'final_weighted_value' (and 'original_sum_value')
+        value_column = 'dissolved_value' if 'dissolved_value' in result.columns else 'final_weighted_value'
+        result = result[['pg_id', value_column]].rename(columns={value_column: f'process_{process}'})
+
+        combined = result if combined is None else combined.merge(result, on='pg_id', how='outer')
+
+    return combined
+
+
+def define_process(process_selection, intersected_gdf, process_params=None):
+    """
+    Execute a selected process based on user input and optional parameters.
+
+    Args:
+        process_selection (int or str): The selected process number (1, 2, 3, 4, 5 or 6), or 'all'
+                                        for every process side by side (see define_all_processes).
+        intersected_gdf (GeoDataFrame): The intersected PG/FEWS NET fragments.
+        process_params (dict or None): Parameters from get_process_parameters. If None, the user
+                                       is prompted for them.
+
+    Returns:
+        DataFrame: The result of the selected process.
+    """
+    if process_params is None:
+        process_params = get_process_parameters(process_selection)
+
+    if process_selection == 'all':
+        result = define_all_processes(intersected_gdf, process_params)
+        return result
+
+    if process_selection == 1:
+        result = calculate_weighted_values(intersected_gdf)
+        return result
+
+    elif process_selection == 2:
+        result = assign_max_above_threshold_with_fallback(intersected_gdf, threshold=process_params['threshold'])
+        return result
+
+    elif process_selection == 3:
+        result = assign_combined_threshold(
+            intersected_gdf,
+            proportional_threshold=process_params['proportional_threshold'],
+            critical_value=process_params['critical_value'],
+        )
         return result
 
     elif process_selection == 4:
@@ -60,20 +164,10 @@ def define_process(process_selection, intersected_gdf):
     
     elif process_selection == 6:
 
-        # Step 1: Get population thresholds (user can modify or use defaults)
-        thresholds = get_population_thresholds(default_thresholds=[50, 85])
-
-        # Step 2: Calculate population percentiles based on the thresholds
-        percentile_calc = calculate_population_percentiles(intersected_gdf, column='Cell_population', percentiles=thresholds)
-
-        # Step 3: Dynamically identify percentile keys and get user-defined weights
-        sorted_percentiles = sorted(percentile_calc.keys(), key=lambda x: int(x.rstrip('th')), reverse=True)
-        print("\nDefine the weights for each population percentile.")
-        user_defined_weights = get_user_defined_weights(sorted_percentiles)
-
-        result = aggregate_with_weighted_proportions(intersected_gdf, percentile_calc, user_defined_weights)
+        # Calculate population percentiles based on the thresholds
+        percentile_calc = calculate_population_percentiles(intersected_gdf, column='Cell_population', percentiles=process_params['thresholds'])
 
-        #result = aggregate_with_weighted_proportions(intersected_gdf, percentile_calc)
+        result = aggregate_with_weighted_proportions(intersected_gdf, percentile_calc, process_params['weights'])
         return result
 
 
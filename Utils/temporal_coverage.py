@@ -6,6 +6,8 @@ import pandas as pd
 
 from ingester3.extensions import *
 
+from Utils.pg_grid_index import pg_cells
+
 # Step 7: Plot the results
 def plot_results(icp_country_result, plotted_attribute='present'):
     """
@@ -48,7 +50,8 @@ def plot_fewsnet_scenario_coverage(
     ipc,
     target_year=2023,
     plotted_attribute = 'count', # this could also be 'present'
-    shapefile_path="Data/Processed/extent_shapefile/pg_viewser_extent.shp"
+    shapefile_path=None,
+    generate=None
 ):
     """
     Analyze and visualize the time and space availability of FEWSNET data for each classification.
@@ -57,16 +60,20 @@ def plot_fewsnet_scenario_coverage(
         ipc_start_date (str): Start date for IPC data retrieval.
         ipc_end_date (str): End date for IPC data retrieval.
         target_year (int): Year to filter the PG data.
-        shapefile_path (str): Path to the shapefile containing PG and geometry attributes.
+        shapefile_path (str or None): Path to the shapefile containing PG and geometry attributes.
+                                      Defaults to None, in which case only the cells present in the
+                                      PG data are generated from the PG lattice.
+        generate (bool or None): Whether to generate the graphic. Prompts if None.
     
     Returns:
         GeoDataFrame: Merged GeoDataFrame with the analysis results.
     """
 
     # Prompt the user to decide whether to run the function
-    user_input = input("Do you want to generate an IPC completeness graphic? (yes/no): ").strip().lower()
+    if generate is None:
+        generate = input("Do you want to generate an IPC completeness graphic? (yes/no): ").strip().lower() in ['yes', 'y']
 
-    if user_input not in ['yes', 'y']:
+    if not generate:
         print("Skipping IPC completeness graphic generation.")
         return
 
@@ -90,8 +97,8 @@ def plot_fewsnet_scenario_coverage(
     dflim = df[['priogrid_gid', 'year', 'country_name']].drop_duplicates()  # Filter fields
     dflim_year = dflim[dflim['year'] == target_year]  # Filter by target year
 
-    # Step 4: Load shapefile and merge with PG data
-    gdf = gpd.read_file(shapefile_path)  # Load shapefile
+    # Step 4: Generate the PG cells (or load a supplied shapefile) and merge with PG data
+    gdf = pg_cells(dflim_year['priogrid_gid']) if shapefile_path is None else gpd.read_file(shapefile_path)
     merged_data = gdf.merge(dflim_year, left_on='pg_id', right_on='priogrid_gid', how='inner')
 
     # Step 5: Merge IPC data with spatial data
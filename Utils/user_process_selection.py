@@ -1,14 +1,16 @@
-def get_process_selection(default_process=6):
+def get_process_selection(default_process=6, selection=None):
     """
-    Prompt the user to select a process from options 1, 2, 3, 4, 5, or 6.
+    Prompt the user to select a process from options 1, 2, 3, 4, 5, or 6, or 'all' to compute
+    every process side by side for comparison.
     Defaults to process 6 if no input is provided, with a detailed explanation of each option.
     Includes an option to quit the process.
 
     Args:
         default_process (int): The default process to use if no input is provided.
+        selection (int, str or None): A preset process number or 'all' (e.g. from a run configuration). Prompts if None.
 
     Returns:
-        int: The selected process number (1, 2, 3, 4, 5, or 6), or None if the user quits.
+        int or str: The selected process number (1, 2, 3, 4, 5, or 6), 'all', or None if the user quits.
     """
     # Define the process descriptions
     process_descriptions = {
@@ -27,15 +29,26 @@ def get_process_selection(default_process=6):
   - Calculates a weighted value for each row and aggregates by `pg_id`. (default)"""
     }
 
+    # A preset selection is validated instead of prompting
+    if selection is not None:
+        if str(selection).strip().lower() == 'all':
+            print("Selected process: all")
+            return 'all'
+        if int(selection) not in process_descriptions:
+            raise ValueError(f"Invalid process selection {selection}. Please select 1, 2, 3, 4, 5, or 6.")
+        print(f"Selected process: {int(selection)}")
+        return int(selection)
+
     # Display the descriptions to the user
     print("\nProcess Selection Options:\n")
     for key, description in process_descriptions.items():
         print(f"{key}: {description}\n")
+    print("all: - Computes processes 1-6 from the same intersection, one column per process (for comparison).\n")
 
     # Prompt for user selection
     while True:
         try:
-            print(f"Please select a process: 1, 2, 3, 4, 5, or 6 (default: {default_process})")
+            print(f"Please select a process: 1, 2, 3, 4, 5, 6, or 'all' (default: {default_process})")
             print("Type 'q' to quit the process.")
             user_input = input("Enter your selection (or press Enter to use the default): ").strip()
 
@@ -49,6 +62,9 @@ def get_process_selection(default_process=6):
                 print(f"No input provided. Using default process: {default_process}")
                 return default_process
 
+            if user_input.lower() == 'all':
+                return 'all'
+
             # Convert input to integer and validate
             process_selection = int(user_input)
             if process_selection in process_descriptions.keys():
@@ -0,0 +1,125 @@
+import os
+from pathlib import Path
+
+import geopandas as gpd
+import pandas as pd
+
+
+# Result partitions, in folder order: <results>/country_code=<cc>/processing_date=<date>/part-0.parquet
+PARTITION_COLUMNS = ['country_code', 'processing_date']
+
+
+def split_cell_geometry(result_df):
+    """
+    Separate the PG cell polygons from the result rows.
+
+    The results repeat the polygon of every cell once per date; the polygons are kept once per pg_id instead.
+
+    Args:
+        result_df (DataFrame or GeoDataFrame): The results with a 'pg_id' column (and geometry).
+
+    Returns:
+        tuple: (results without geometry as a DataFrame, GeoDataFrame of 'pg_id' and geometry or None
+               if the results have no geometry).
+    """
+    if not isinstance(result_df, gpd.GeoDataFrame):
+        return pd.DataFrame(result_df), None
+
+    geometry_name = result_df.geometry.name
+    cells = result_df[['pg_id', geometry_name]].drop_duplicates(subset='pg_id').sort_values('pg_id')
+    cells = gpd.GeoDataFrame(cells.reset_index(drop=True), geometry=geometry_name, crs=result_df.crs)
+
+    return pd.DataFrame(result_df.drop(columns=geometry_name)), cells
+
+
+def write_partitioned_results(result_df, output_folder):
+    """
+    Save the results as Parquet partitioned by country and processing date, with the cell geometry
+    written once in a separate table.
+
+    Layout of output_folder:
+        results/country_code=<cc>/processing_date=<date>/part-0.parquet   (result rows, no geometry)
+        cells.parquet                                                     (pg_id and cell polygon)
+
+    Partitions that are written again replace their earlier files; other partitions are kept.
+
+    Args:
+        result_df (DataFrame or GeoDataFrame): The results for all countries and dates.
+        output_folder (str or Path): The folder of the dataset.
+
+    Returns:
+        Path: The output folder.
+    """
+    output_folder = Path(output_folder)
+    results, cells = split_cell_geometry(result_df)
+
+    missing = [column for column in PARTITION_COLUMNS if column not in results.columns]
+    if missing:
+        raise ValueError(f"The results have no {', '.join(missing)} column(s) to partition by.")
+
+    os.makedirs(output_folder, exist_ok=True)
+    results.to_parquet(
+        output_folder / 'results',
+        index=False,
+        partition_cols=PARTITION_COLUMNS,
+        basename_template='part-{i}.parquet',
+        existing_data_behavior='delete_matching',
+    )
+
+    if cells is not None:
+        # Keep the cells of partitions written earlier (e.g. other countries)
+        cells_path = output_folder / 'cells.parquet'
+        if cells_path.exists():
+            previous = gpd.read_parquet(cells_path)
+            previous = previous[~previous['pg_id'].isin(cells['pg_id'])].to_crs(cells.crs)
+            cells = gpd.GeoDataFrame(pd.concat([previous, cells], ignore_index=True).sort_values('pg_id'), crs=cells.crs)
+
+        # Write atomically; the table may be read while it is rewritten
+        partial_path = cells_path.with_name(f"cells.parquet.{os.getpid()}.part")
+        cells.to_parquet(partial_path, index=False)
+        os.replace(partial_path, cells_path)
+
+    print(f"Saved {len(results)} result rows to: {output_folder}")
+    return output_folder
+
+
+def read_partitioned_results(output_folder, with_geometry=False, filters=None):
+    """
+    Read a dataset written by write_partitioned_results.
+
+    Args:
+        output_folder (str or Path): The folder of the dataset.
+        with_geometry (bool): Join the cell polygons back onto the results (returns a GeoDataFrame).
+        filters (list or None): Parquet filters on the partitions, e.g. [('country_code', '==', 'ET')].
+
+    Returns:
+        DataFrame or GeoDataFrame: The results; the partition columns are read as strings.
+    """
+    output_folder = Path(output_folder)
+    results = pd.read_parquet(output_folder / 'results', filters=filters)
+    for column in PARTITION_COLUMNS:
+        results[column] = results[column].astype(str)
+
+    if not with_geometry:
+        return results
+
+    cells = gpd.read_parquet(output_folder / 'cells.parquet')
+    return cells.merge(results, on='pg_id', how='right')
+
+
+def export_csv(result_df, csv_path):
+    """
+    Export the results as one CSV file (geometry written as WKT), as produced before the Parquet output.
+
+    Args:
+        result_df (DataFrame or GeoDataFrame): The results for all countries and dates.
+        csv_path (str or Path): The CSV file to write.
+
+    Returns:
+        Path: The CSV path.
+    """
+    csv_path = Path(csv_path)
+    os.makedirs(csv_path.parent, exist_ok=True)
+    result_df.to_csv(csv_path)
+    print(f"Exported the results to: {csv_path}")
+    return csv_path